@@ -6,88 +6,290 @@ Purpose: Comprehensive CSV analysis toolkit
 
 import pandas as pd
 import numpy as np
+import csv
+import functools
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
-import matplotlib.pyplot as plt
+from typing import Dict, List, Optional, Tuple
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import seaborn as sns
 import logging
 
+from utils.io import fresh_sibling, write_json
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# pyarrow is optional; without it only CSV inputs are supported
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pac
+    import pyarrow.csv as pa_csv
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Polars is optional; aggregate_by_group falls back to pandas without it
+try:
+    import polars as pl
+    POLARS_AVAILABLE = True
+except ImportError:
+    POLARS_AVAILABLE = False
+
+# Columns compare_scenarios needs from each scenario file
+SCENARIO_SUMMARY_COLUMNS = ["tuition_change_dollars", "students_affected", "equity_risk_class"]
+
+# Text columns with fewer distinct values than this are loaded as categoricals
+CATEGORY_MAX_UNIQUE = 256
+
+
+def _resolve_table_path(path: str) -> Path:
+    """
+    Pick the file to read for a table path.
+    
+    A .csv path whose .parquet sibling is at least as new resolves to the
+    Parquet file (see convert_csv_to_parquet).
+    
+    Args:
+        path: Path to a .parquet, .feather or .csv file
+    
+    Returns:
+        Path to read
+    """
+    path_obj = Path(path)
+    
+    if path_obj.suffix == ".csv" and PYARROW_AVAILABLE:
+        parquet_path = fresh_sibling(path_obj, ".parquet")
+        if parquet_path is not None:
+            return parquet_path
+    
+    return path_obj
+
+
+def _read_table(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read a table, preferring columnar formats over CSV (see _resolve_table_path).
+    
+    Args:
+        path: Path to a .parquet, .feather or .csv file
+        columns: Optional subset of columns to load (missing names are ignored)
+    
+    Returns:
+        Loaded DataFrame
+    """
+    path_obj = _resolve_table_path(path)
+    
+    if path_obj.suffix == ".parquet":
+        if columns is not None:
+            available = pq.read_schema(path_obj).names
+            columns = [col for col in columns if col in available]
+        return pd.read_parquet(path_obj, engine="pyarrow", columns=columns)
+    
+    if path_obj.suffix == ".feather":
+        if columns is not None:
+            available = pa_ipc.open_file(path_obj).schema.names
+            columns = [col for col in columns if col in available]
+        return pd.read_feather(path_obj, columns=columns)
+    
+    if columns is not None:
+        header = pd.read_csv(path_obj, nrows=0).columns
+        usecols = [col for col in header if col in columns]
+        # Keep one column when nothing matches so the row count survives
+        return pd.read_csv(path_obj, usecols=usecols or list(header[:1]))
+    return pd.read_csv(path_obj)
+
+
+def convert_csv_to_parquet(csv_path: str) -> str:
+    """
+    Write a Parquet copy next to a CSV so later reads skip CSV parsing.
+    
+    Args:
+        csv_path: Path to CSV file
+    
+    Returns:
+        Path to the Parquet file
+    """
+    parquet_path = Path(csv_path).with_suffix(".parquet")
+    df = pd.read_csv(csv_path)
+    df.to_parquet(parquet_path, engine="pyarrow", compression="snappy", index=False)
+    logger.info(f"Converted {csv_path} to {parquet_path}")
+    return str(parquet_path)
+
+
+@functools.lru_cache(maxsize=16)
+def _load(path: str, mtime: float) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Parse a table once per (path, mtime) together with its numeric subset.
+    
+    The cached frames are shared between callers and must be treated as read-only.
+    
+    Args:
+        path: Path to table file
+        mtime: Modification time of the file, part of the cache key
+    
+    Returns:
+        Tuple of (full DataFrame, numeric-column DataFrame)
+    """
+    df = _read_table(path)
+    
+    # Low-cardinality text columns (state, institution_type, ...) group on integer codes
+    for col in df.select_dtypes(include=["object", "string"]).columns:
+        if df[col].nunique() < CATEGORY_MAX_UNIQUE:
+            df[col] = df[col].astype("category")
+    
+    numeric_df = df.select_dtypes(include=[np.number])
+    return df, numeric_df
+
+
+def load_table(path: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Load a table through the parse cache; rewriting the file invalidates the entry.
+    
+    The cache is keyed on the file actually read (a .csv path may resolve to
+    its Parquet copy), so rewriting either one is picked up.
+    
+    Args:
+        path: Path to table file
+    
+    Returns:
+        Tuple of (full DataFrame, numeric-column DataFrame), both read-only
+    """
+    table_path = _resolve_table_path(path)
+    return _load(str(table_path), table_path.stat().st_mtime)
+
 
-def analyze_csv(csv_path: str) -> Dict:
+def analyze_csv(csv_path: str, detailed: bool = False) -> Dict:
     """
     Load CSV and generate basic statistics.
     
     Args:
         csv_path: Path to CSV file
+        detailed: Also report deep memory usage, which walks every string value
     
     Returns:
         Dict with basic statistics
     """
-    df = pd.read_csv(csv_path)
+    df = _read_table(csv_path)
     
     stats = {
         "file_path": csv_path,
         "shape": list(df.shape),
         "columns": list(df.columns),
-        "memory_usage_mb": round(df.memory_usage(deep=True).sum() / 1024**2, 2),
+        "memory_usage_mb": round(df.memory_usage().sum() / 1024**2, 2),
         "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()}
     }
     
+    if detailed:
+        stats["memory_usage_deep_mb"] = round(df.memory_usage(deep=True).sum() / 1024**2, 2)
+    
     return stats
 
 
-def statistical_summary(df: pd.DataFrame) -> pd.DataFrame:
+def statistical_summary(df: pd.DataFrame, numeric_cols: Optional[List[str]] = None) -> pd.DataFrame:
     """
     Generate statistical summary (mean, median, std, min, max, quartiles).
     
     Args:
         df: Input DataFrame
+        numeric_cols: Optional precomputed numeric column names
     
     Returns:
         Summary DataFrame
     """
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    if numeric_cols is None:
+        numeric_cols = df.select_dtypes(include=[np.number]).columns
     
     if len(numeric_cols) == 0:
         logger.warning("No numeric columns found for statistical summary")
         return pd.DataFrame()
     
+    # describe() already provides std; its 50% quantile is the median
     summary = df[numeric_cols].describe().T
-    summary["median"] = df[numeric_cols].median()
-    summary["std"] = df[numeric_cols].std()
+    summary["median"] = summary["50%"]
     
     return summary
 
 
-def correlation_analysis(df: pd.DataFrame) -> pd.DataFrame:
+def correlation_analysis(
+    df: pd.DataFrame,
+    method: str = "pearson",
+    numeric_cols: Optional[List[str]] = None
+) -> pd.DataFrame:
     """
     Generate correlation matrix for numeric columns.
     
     Args:
         df: Input DataFrame
+        method: "pearson" (vectorized), or any other DataFrame.corr method
+        numeric_cols: Optional precomputed numeric column names
     
     Returns:
         Correlation matrix DataFrame
     """
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    if numeric_cols is None:
+        numeric_cols = df.select_dtypes(include=[np.number]).columns
     
     if len(numeric_cols) < 2:
         logger.warning("Need at least 2 numeric columns for correlation analysis")
         return pd.DataFrame()
     
-    corr_matrix = df[numeric_cols].corr()
+    if method != "pearson":
+        return df[numeric_cols].corr(method=method)
+    
+    arr = df[numeric_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if np.isnan(arr).any():
+            corr = _masked_corrcoef(arr)
+        else:
+            corr = np.corrcoef(arr, rowvar=False)
+    
+    corr_matrix = pd.DataFrame(corr, index=numeric_cols, columns=numeric_cols)
     return corr_matrix
 
 
+def _masked_corrcoef(arr: np.ndarray) -> np.ndarray:
+    """
+    Pearson correlation over pairwise-complete rows, computed with matrix products.
+    
+    Matches DataFrame.corr() on data with missing values: each pair of columns
+    uses only the rows where both are present.
+    
+    Args:
+        arr: 2-D float array (rows x columns) containing NaNs
+    
+    Returns:
+        Correlation matrix (columns x columns)
+    """
+    valid = ~np.isnan(arr)
+    mask = valid.astype(np.float64)
+    # Centering first keeps the sums small; correlation is shift-invariant
+    means = np.where(valid, arr, 0.0).sum(axis=0) / valid.sum(axis=0)
+    centered = np.where(valid, arr - means, 0.0)
+    
+    pair_counts = mask.T @ mask
+    sums = centered.T @ mask                   # sums[i, j]: sum of col i where j present
+    sq_sums = (centered ** 2).T @ mask
+    cross = centered.T @ centered
+    
+    cov = cross - sums * sums.T / pair_counts
+    var_i = sq_sums - sums ** 2 / pair_counts
+    corr = cov / np.sqrt(var_i * var_i.T)
+    corr[pair_counts < 2] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
 def distribution_plots(
     df: pd.DataFrame,
     output_dir: str,
     columns: Optional[List[str]] = None,
-    max_plots: int = 10
+    max_plots: int = 10,
+    numeric_cols: Optional[List[str]] = None,
+    overwrite: bool = True
 ):
     """
     Generate distribution plots (histograms, box plots).
@@ -97,37 +299,68 @@ def distribution_plots(
         output_dir: Output directory for plots
         columns: Optional list of columns to plot
         max_plots: Maximum number of plots to generate
+        numeric_cols: Optional precomputed numeric column names
+        overwrite: Regenerate plots that already exist (False skips columns
+                   whose histogram and box plot are both on disk)
     """
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
     
-    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    if numeric_cols is None:
+        numeric_cols = df.select_dtypes(include=[np.number]).columns
+    numeric_cols = list(numeric_cols)
     
     if columns:
         numeric_cols = [col for col in columns if col in numeric_cols]
     
     numeric_cols = numeric_cols[:max_plots]
     
+    if not overwrite:
+        numeric_cols = [
+            col for col in numeric_cols
+            if not (
+                (output_path / f"{col}_histogram.png").exists()
+                and (output_path / f"{col}_boxplot.png").exists()
+            )
+        ]
+        if not numeric_cols:
+            logger.info(f"All plots already exist in {output_path}; skipping")
+            return
+    
+    # One figure per plot kind, reused across columns. They are drawn on Agg
+    # canvases directly (the plots only go to files), bypassing pyplot and
+    # leaving the caller's backend alone.
+    hist_fig = Figure(figsize=(10, 6))
+    FigureCanvasAgg(hist_fig)
+    hist_ax = hist_fig.add_subplot()
+    box_fig = Figure(figsize=(8, 6))
+    FigureCanvasAgg(box_fig)
+    box_ax = box_fig.add_subplot()
+    
     for col in numeric_cols:
         try:
+            values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            values = values[~np.isnan(values)]
+            
             # Histogram
-            plt.figure(figsize=(10, 6))
-            df[col].hist(bins=30, edgecolor='black')
-            plt.title(f"Distribution of {col}")
-            plt.xlabel(col)
-            plt.ylabel("Frequency")
-            plt.tight_layout()
-            plt.savefig(output_path / f"{col}_histogram.png", dpi=150, bbox_inches='tight')
-            plt.close()
+            hist_ax.clear()
+            counts, edges = np.histogram(values, bins=30)
+            hist_ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge", edgecolor="black")
+            hist_ax.grid(True)
+            hist_ax.set_title(f"Distribution of {col}")
+            hist_ax.set_xlabel(col)
+            hist_ax.set_ylabel("Frequency")
+            hist_fig.tight_layout()
+            hist_fig.savefig(output_path / f"{col}_histogram.png", dpi=150, bbox_inches='tight')
             
             # Box plot
-            plt.figure(figsize=(8, 6))
-            df[col].plot(kind='box')
-            plt.title(f"Box Plot of {col}")
-            plt.ylabel(col)
-            plt.tight_layout()
-            plt.savefig(output_path / f"{col}_boxplot.png", dpi=150, bbox_inches='tight')
-            plt.close()
+            box_ax.clear()
+            box_ax.boxplot(values)
+            box_ax.set_xticks([1], [col])
+            box_ax.set_title(f"Box Plot of {col}")
+            box_ax.set_ylabel(col)
+            box_fig.tight_layout()
+            box_fig.savefig(output_path / f"{col}_boxplot.png", dpi=150, bbox_inches='tight')
             
             logger.info(f"Generated plots for {col}")
         except Exception as e:
@@ -137,7 +370,8 @@ def distribution_plots(
 def aggregate_by_group(
     df: pd.DataFrame,
     group_cols: List[str],
-    agg_functions: Optional[Dict[str, List[str]]] = None
+    agg_functions: Optional[Dict[str, List[str]]] = None,
+    numeric_cols: Optional[List[str]] = None
 ) -> pd.DataFrame:
     """
     Group by columns and compute aggregated metrics.
@@ -146,6 +380,7 @@ def aggregate_by_group(
         df: Input DataFrame
         group_cols: Columns to group by
         agg_functions: Optional dict mapping columns to aggregation functions
+        numeric_cols: Optional precomputed numeric column names
     
     Returns:
         Aggregated DataFrame
@@ -159,28 +394,125 @@ def aggregate_by_group(
     
     if agg_functions is None:
         # Default: mean for numeric, count for all
-        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+        if numeric_cols is None:
+            numeric_cols = df.select_dtypes(include=[np.number]).columns
         numeric_cols = [col for col in numeric_cols if col not in group_cols]
         
+        numeric_cols = numeric_cols[:10]  # Limit to first 10
+        
+        if POLARS_AVAILABLE and PYARROW_AVAILABLE:
+            return _aggregate_mean_count_polars(df, group_cols, numeric_cols)
+        
         agg_functions = {
-            col: ["mean", "count"] for col in numeric_cols[:10]  # Limit to first 10
+            col: ["mean", "count"] for col in numeric_cols
         }
     
-    aggregated = df.groupby(group_cols).agg(agg_functions).reset_index()
+    # Named aggregation yields flat {col}_{func} names directly
+    named_aggs = {}
+    for col, funcs in agg_functions.items():
+        for func in ([funcs] if isinstance(funcs, str) else funcs):
+            named_aggs[f"{col}_{func}"] = (col, func)
     
-    # Flatten column names
-    aggregated.columns = ["_".join(col).strip() if col[1] else col[0] 
-                          for col in aggregated.columns.values]
+    aggregated = df.groupby(group_cols, observed=True).agg(**named_aggs).reset_index()
     
     return aggregated
 
 
+def _aggregate_mean_count_polars(
+    df: pd.DataFrame,
+    group_cols: List[str],
+    numeric_cols: List[str]
+) -> pd.DataFrame:
+    """
+    Polars version of the default mean/count aggregation in aggregate_by_group.
+    
+    Output matches the pandas path: null group keys dropped, groups sorted,
+    columns named {col}_mean / {col}_count.
+    
+    Args:
+        df: Input DataFrame
+        group_cols: Columns to group by (all present in df)
+        numeric_cols: Columns to aggregate
+    
+    Returns:
+        Aggregated DataFrame
+    """
+    aggregations = []
+    for col in numeric_cols:
+        aggregations.append(pl.col(col).mean().alias(f"{col}_mean"))
+        aggregations.append(pl.col(col).count().cast(pl.Int64).alias(f"{col}_count"))
+    
+    aggregated = (
+        pl.from_pandas(df[group_cols + numeric_cols])
+        .lazy()
+        .drop_nulls(subset=group_cols)
+        .group_by(group_cols)
+        .agg(aggregations)
+        .sort(group_cols)
+        .collect()
+    )
+    return aggregated.to_pandas()
+
+
+def _scenario_summary_arrow(path: Path) -> Dict:
+    """
+    Scenario summary scalars computed with Arrow kernels, without a pandas frame.
+    
+    Args:
+        path: Path to a .csv or .parquet scenario file
+    
+    Returns:
+        Dict with colleges_count, avg_tuition_change, total_students_affected
+        and high_risk_colleges (same semantics as the pandas path)
+    """
+    if path.suffix == ".parquet":
+        available = pq.read_schema(path).names
+        columns = [col for col in SCENARIO_SUMMARY_COLUMNS if col in available]
+        table = pq.read_table(path, columns=columns)
+    else:
+        with open(path, newline="") as f:
+            header = next(csv.reader(f), [])
+        columns = [col for col in SCENARIO_SUMMARY_COLUMNS if col in header]
+        # An empty include list would load every column; the first one keeps the row count
+        table = pa_csv.read_csv(
+            path,
+            convert_options=pa_csv.ConvertOptions(include_columns=columns or header[:1])
+        )
+    
+    def present(col):
+        # Columns that are absent or entirely empty (null type) have no values
+        return col in columns and not pa.types.is_null(table.schema.field(col).type)
+    
+    avg_tuition_change = 0.0
+    if "tuition_change_dollars" in columns:
+        mean = pac.mean(table["tuition_change_dollars"]).as_py() if present("tuition_change_dollars") else None
+        avg_tuition_change = np.nan if mean is None else mean
+    
+    total_students_affected = 0
+    if present("students_affected"):
+        total_students_affected = pac.sum(table["students_affected"], min_count=0).as_py()
+    
+    high_risk_colleges = 0
+    if present("equity_risk_class"):
+        risk_class = table["equity_risk_class"]
+        if pa.types.is_dictionary(risk_class.type):
+            risk_class = risk_class.cast(risk_class.type.value_type)
+        high_risk_colleges = pac.sum(pac.equal(risk_class, "High"), min_count=0).as_py()
+    
+    return {
+        "colleges_count": table.num_rows,
+        "avg_tuition_change": avg_tuition_change,
+        "total_students_affected": total_students_affected,
+        "high_risk_colleges": high_risk_colleges
+    }
+
+
 def compare_scenarios(scenario_csvs: List[str]) -> pd.DataFrame:
     """
     Compare multiple scenario outputs side-by-side.
     
     Args:
-        scenario_csvs: List of CSV file paths
+        scenario_csvs: List of scenario file paths (CSV, Parquet or Feather)
     
     Returns:
         Comparison DataFrame
@@ -188,17 +520,21 @@ def compare_scenarios(scenario_csvs: List[str]) -> pd.DataFrame:
     comparisons = []
     
     for csv_path in scenario_csvs:
-        df = pd.read_csv(csv_path)
         scenario_name = Path(csv_path).stem.replace("predicted_impact_", "")
+        table_path = _resolve_table_path(csv_path)
         
         # Calculate summary stats
-        summary = {
-            "scenario": scenario_name,
-            "colleges_count": len(df),
-            "avg_tuition_change": df.get("tuition_change_dollars", pd.Series([0])).mean(),
-            "total_students_affected": df.get("students_affected", pd.Series([0])).sum(),
-            "high_risk_colleges": (df.get("equity_risk_class", pd.Series(["Low"])) == "High").sum() if "equity_risk_class" in df.columns else 0
-        }
+        if PYARROW_AVAILABLE and table_path.suffix in (".csv", ".parquet"):
+            summary = {"scenario": scenario_name, **_scenario_summary_arrow(table_path)}
+        else:
+            df = _read_table(csv_path, columns=SCENARIO_SUMMARY_COLUMNS)
+            summary = {
+                "scenario": scenario_name,
+                "colleges_count": len(df),
+                "avg_tuition_change": df.get("tuition_change_dollars", pd.Series([0])).mean(),
+                "total_students_affected": df.get("students_affected", pd.Series([0])).sum(),
+                "high_risk_colleges": (df.get("equity_risk_class", pd.Series(["Low"])) == "High").sum() if "equity_risk_class" in df.columns else 0
+            }
         
         comparisons.append(summary)
     
@@ -209,7 +545,8 @@ def compare_scenarios(scenario_csvs: List[str]) -> pd.DataFrame:
 def analyze_scenario(
     csv_path: str,
     scenario_name: Optional[str] = None,
-    output_dir: str = "outputs/analysis"
+    output_dir: str = "outputs/analysis",
+    overwrite_plots: bool = True
 ) -> Dict:
     """
     Complete analysis for a single scenario CSV.
@@ -218,6 +555,7 @@ def analyze_scenario(
         csv_path: Path to CSV file
         scenario_name: Optional scenario name
         output_dir: Output directory
+        overwrite_plots: Regenerate distribution plots that already exist
     
     Returns:
         Analysis results dict
@@ -227,14 +565,15 @@ def analyze_scenario(
     
     logger.info(f"Analyzing scenario: {scenario_name}")
     
-    # Load data
-    df = pd.read_csv(csv_path)
+    # Load data (cached, shared with other analyses of the same file)
+    df, numeric_df = load_table(csv_path)
+    numeric_cols = list(numeric_df.columns)
     
     # Statistical summary
-    stats_summary = statistical_summary(df)
+    stats_summary = statistical_summary(df, numeric_cols=numeric_cols)
     
     # Correlation analysis
-    corr_matrix = correlation_analysis(df)
+    corr_matrix = correlation_analysis(df, numeric_cols=numeric_cols)
     
     # Save statistics
     output_path = Path(output_dir)
@@ -242,8 +581,7 @@ def analyze_scenario(
     
     stats_path = output_path / f"{scenario_name}_statistics.json"
     stats_dict = stats_summary.to_dict() if not stats_summary.empty else {}
-    with open(stats_path, "w") as f:
-        json.dump(stats_dict, f, indent=2, default=str)
+    write_json(stats_dict, stats_path)
     
     # Save correlation matrix
     if not corr_matrix.empty:
@@ -252,16 +590,18 @@ def analyze_scenario(
     
     # Generate plots
     plots_dir = output_path / f"{scenario_name}_plots"
-    distribution_plots(df, str(plots_dir), max_plots=5)
+    distribution_plots(
+        df, str(plots_dir), max_plots=5, numeric_cols=numeric_cols, overwrite=overwrite_plots
+    )
     
     # Aggregate by state/type if available
     aggregations = {}
     if "state" in df.columns:
-        state_agg = aggregate_by_group(df, ["state"])
+        state_agg = aggregate_by_group(df, ["state"], numeric_cols=numeric_cols)
         aggregations["by_state"] = state_agg.to_dict("records")
     
     if "institution_type" in df.columns:
-        type_agg = aggregate_by_group(df, ["institution_type"])
+        type_agg = aggregate_by_group(df, ["institution_type"], numeric_cols=numeric_cols)
         aggregations["by_institution_type"] = type_agg.to_dict("records")
     
     results = {
@@ -279,9 +619,40 @@ def analyze_scenario(
     return results
 
 
+def analyze_scenarios(
+    csv_paths: List[str],
+    output_dir: str = "outputs/analysis",
+    workers: Optional[int] = None
+) -> List[Dict]:
+    """
+    Run analyze_scenario over several scenario files in parallel processes.
+    
+    Args:
+        csv_paths: List of scenario file paths
+        output_dir: Output directory
+        workers: Number of worker processes (defaults to CPU count, capped at the number of files)
+    
+    Returns:
+        List of analysis results dicts, in the same order as csv_paths
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(csv_paths)))
+    
+    if workers == 1:
+        return [analyze_scenario(csv_path, output_dir=output_dir) for csv_path in csv_paths]
+    
+    logger.info(f"Analyzing {len(csv_paths)} scenarios with {workers} workers")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(functools.partial(analyze_scenario, output_dir=output_dir), csv_paths))
+
+
 if __name__ == "__main__":
     import sys
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 2:
+        results = analyze_scenarios(sys.argv[1:])
+        print(json.dumps(results, indent=2, default=str))
+    elif len(sys.argv) > 1:
         csv_path = sys.argv[1]
         results = analyze_scenario(csv_path)
         print(json.dumps(results, indent=2, default=str))
@@ -6,55 +6,179 @@ Purpose: Domain-specific analysis functions
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Optional
 import logging
 
+from utils.io import write_json
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def calculate_affordability_impact_score(df: pd.DataFrame) -> pd.Series:
+def _float_values(series: pd.Series) -> np.ndarray:
+    """Column values as a float64 array with NaN for missing entries."""
+    return series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _column_max(values: np.ndarray) -> float:
+    """Max ignoring NaNs (NaN when nothing is present), like Series.max()."""
+    present = values[~np.isnan(values)]
+    return present.max() if present.size else np.nan
+
+
+def _normalize_into(
+    out: np.ndarray,
+    values: np.ndarray,
+    fallback: float,
+    invert: bool = False,
+    max_value: Optional[float] = None
+):
+    """
+    Scale values to 0-100 by their max, writing into out.
+    
+    Args:
+        out: Destination slice of the score buffer
+        values: Component values
+        fallback: Constant used when the max is not positive
+        invert: Score (1 - value/max) instead of value/max
+        max_value: Precomputed max of values (computed here when None)
+    """
+    if max_value is None:
+        max_value = _column_max(values)
+    if max_value > 0:
+        np.divide(values, max_value, out=out)
+        if invert:
+            np.subtract(1.0, out, out=out)
+        out *= 100
+    else:
+        out[:] = fallback
+
+
+def _add_component(totals: np.ndarray, counts: np.ndarray, component: np.ndarray):
+    """
+    Fold one score component into running per-row sums, skipping NaNs.
+    
+    Args:
+        totals: Running sum of present component values per row
+        counts: Number of present components per row
+        component: Component scores for this pass
+    """
+    valid = ~np.isnan(component)
+    np.add(totals, component, out=totals, where=valid)
+    counts += valid
+
+
+def _composite_score(totals: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+    Row-wise mean of the accumulated components, like DataFrame.mean(axis=1).
+    
+    Args:
+        totals: Running sum of present component values per row
+        counts: Number of present components per row
+    
+    Returns:
+        Composite score per row (NaN where every component is missing)
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return totals / counts
+
+
+def _enrollment_column(df: pd.DataFrame) -> Optional[str]:
+    """First enrollment column present (could be enrollment or total_enrollment)."""
+    for col in ["enrollment", "total_enrollment", "total_enroll"]:
+        if col in df.columns:
+            return col
+    return None
+
+
+def _component_maxes(df: pd.DataFrame) -> Dict[str, float]:
+    """
+    Normalisation denominators for the score components, one pass per column.
+    
+    Keys are the component values each max applies to: |tuition change|,
+    hours to cover gap, -|enrollment change| and the enrollment column.
+    
+    Args:
+        df: Input DataFrame
+    
+    Returns:
+        Dict mapping component name to its max (NaN when the column is all missing)
+    """
+    maxes = {}
+    if "tuition_change_dollars" in df.columns:
+        maxes["tuition_change_abs"] = _column_max(np.abs(_float_values(df["tuition_change_dollars"])))
+    if "hours_to_cover_gap" in df.columns:
+        maxes["hours_to_cover_gap"] = _column_max(_float_values(df["hours_to_cover_gap"]))
+    if "enrollment_change_pct" in df.columns:
+        maxes["enrollment_change_drop"] = _column_max(-np.abs(_float_values(df["enrollment_change_pct"])))
+    enrollment_col = _enrollment_column(df)
+    if enrollment_col:
+        maxes["enrollment"] = _column_max(_float_values(df[enrollment_col]))
+    return maxes
+
+
+def _masked_mean(values: np.ndarray, mask: np.ndarray) -> float:
+    """Mean of values[mask] ignoring NaNs (NaN when nothing is left), like Series.mean()."""
+    selected = values[mask]
+    selected = selected[~np.isnan(selected)]
+    return float(selected.mean()) if selected.size else float("nan")
+
+
+def calculate_affordability_impact_score(
+    df: pd.DataFrame,
+    maxes: Optional[Dict[str, float]] = None
+) -> pd.Series:
     """
     Calculate affordability impact score (weighted composite).
     
     Args:
         df: Input DataFrame with impact predictions
+        maxes: Optional precomputed component maxes from _component_maxes
     
     Returns:
         Series with affordability impact scores
     """
-    score_components = []
+    if maxes is None:
+        maxes = {}
+    # Running sums instead of a stacked (n_rows, n_components) buffer
+    score_totals = np.zeros(len(df))
+    score_counts = np.zeros(len(df), dtype=np.uint8)
+    component = np.empty(len(df))
+    n_components = 0
     
     # Component 1: Tuition change (higher = worse)
     if "tuition_change_dollars" in df.columns:
-        tuition_impact = df["tuition_change_dollars"].abs()
-        if tuition_impact.max() > 0:
-            tuition_normalized = (tuition_impact / tuition_impact.max()) * 100
-        else:
-            tuition_normalized = pd.Series(0, index=df.index)
-        score_components.append(tuition_normalized)
+        tuition_impact = np.abs(_float_values(df["tuition_change_dollars"]))
+        _normalize_into(
+            component, tuition_impact, 0,
+            max_value=maxes.get("tuition_change_abs")
+        )
+        _add_component(score_totals, score_counts, component)
+        n_components += 1
     
     # Component 2: Hours to cover gap (more hours = worse)
     if "hours_to_cover_gap" in df.columns:
-        hours_impact = df["hours_to_cover_gap"]
-        if hours_impact.max() > 0:
-            hours_normalized = (hours_impact / hours_impact.max()) * 100
-        else:
-            hours_normalized = pd.Series(0, index=df.index)
-        score_components.append(hours_normalized)
+        hours_impact = _float_values(df["hours_to_cover_gap"])
+        _normalize_into(
+            component, hours_impact, 0,
+            max_value=maxes.get("hours_to_cover_gap")
+        )
+        _add_component(score_totals, score_counts, component)
+        n_components += 1
     
     # Component 3: Enrollment drop (worse for students)
     if "enrollment_change_pct" in df.columns:
-        enrollment_impact = df["enrollment_change_pct"].abs() * -1  # Negative change is bad
-        if enrollment_impact.max() > 0:
-            enrollment_normalized = (enrollment_impact / enrollment_impact.max()) * 100
-        else:
-            enrollment_normalized = pd.Series(0, index=df.index)
-        score_components.append(enrollment_normalized)
+        enrollment_impact = -np.abs(_float_values(df["enrollment_change_pct"]))  # Negative change is bad
+        _normalize_into(
+            component, enrollment_impact, 0,
+            max_value=maxes.get("enrollment_change_drop")
+        )
+        _add_component(score_totals, score_counts, component)
+        n_components += 1
     
     # Combine components
-    if score_components:
-        impact_score = pd.concat(score_components, axis=1).mean(axis=1)
+    if n_components:
+        impact_score = pd.Series(_composite_score(score_totals, score_counts), index=df.index)
     else:
         impact_score = pd.Series(0, index=df.index)
     
@@ -72,31 +196,39 @@ def equity_gap_analysis(df: pd.DataFrame) -> Dict:
         Dict with equity gap metrics
     """
     results = {}
+    if "tuition_change_dollars" not in df.columns:
+        return results
     
-    # Compare by minority status
-    if "pct_minority" in df.columns and "tuition_change_dollars" in df.columns:
-        minority_serving = df[df["pct_minority"] > 50]
-        non_minority_serving = df[df["pct_minority"] <= 50]
+    tuition = _float_values(df["tuition_change_dollars"])
+    
+    # Compare by minority status (rows with missing pct_minority fall in neither group)
+    if "pct_minority" in df.columns:
+        pct_minority = _float_values(df["pct_minority"])
+        minority_serving = pct_minority > 50
+        non_minority_serving = pct_minority <= 50
         
-        if len(minority_serving) > 0 and len(non_minority_serving) > 0:
+        if minority_serving.any() and non_minority_serving.any():
+            minority_avg = _masked_mean(tuition, minority_serving)
+            non_minority_avg = _masked_mean(tuition, non_minority_serving)
             results["minority_gap"] = {
-                "minority_serving_avg_impact": float(minority_serving["tuition_change_dollars"].mean()),
-                "non_minority_serving_avg_impact": float(non_minority_serving["tuition_change_dollars"].mean()),
-                "gap": float(minority_serving["tuition_change_dollars"].mean() - 
-                            non_minority_serving["tuition_change_dollars"].mean())
+                "minority_serving_avg_impact": minority_avg,
+                "non_minority_serving_avg_impact": non_minority_avg,
+                "gap": minority_avg - non_minority_avg
             }
     
     # Compare by low-income status
-    if "pct_low_income" in df.columns and "tuition_change_dollars" in df.columns:
-        low_income_serving = df[df["pct_low_income"] > 50]
-        high_income_serving = df[df["pct_low_income"] <= 50]
+    if "pct_low_income" in df.columns:
+        pct_low_income = _float_values(df["pct_low_income"])
+        low_income_serving = pct_low_income > 50
+        high_income_serving = pct_low_income <= 50
         
-        if len(low_income_serving) > 0 and len(high_income_serving) > 0:
+        if low_income_serving.any() and high_income_serving.any():
+            low_income_avg = _masked_mean(tuition, low_income_serving)
+            high_income_avg = _masked_mean(tuition, high_income_serving)
             results["income_gap"] = {
-                "low_income_serving_avg_impact": float(low_income_serving["tuition_change_dollars"].mean()),
-                "high_income_serving_avg_impact": float(high_income_serving["tuition_change_dollars"].mean()),
-                "gap": float(low_income_serving["tuition_change_dollars"].mean() - 
-                            high_income_serving["tuition_change_dollars"].mean())
+                "low_income_serving_avg_impact": low_income_avg,
+                "high_income_serving_avg_impact": high_income_avg,
+                "gap": low_income_avg - high_income_avg
             }
     
     return results
@@ -117,7 +249,7 @@ def state_vulnerability_ranking(df: pd.DataFrame) -> pd.DataFrame:
         return pd.DataFrame()
     
     # Aggregate by state
-    state_agg = df.groupby("state").agg({
+    state_agg = df.groupby("state", observed=True).agg({
         "tuition_change_dollars": "mean",
         "students_affected": "sum",
         "institution_id": "count"
@@ -126,9 +258,10 @@ def state_vulnerability_ranking(df: pd.DataFrame) -> pd.DataFrame:
     state_agg.columns = ["state", "avg_tuition_impact", "total_students_affected", "college_count"]
     
     # Calculate vulnerability score (weighted)
-    if state_agg["avg_tuition_impact"].max() > 0:
+    tuition_max = state_agg["avg_tuition_impact"].max()
+    if tuition_max > 0:
         state_agg["vulnerability_score"] = (
-            (state_agg["avg_tuition_impact"] / state_agg["avg_tuition_impact"].max()) * 50 +
+            (state_agg["avg_tuition_impact"] / tuition_max) * 50 +
             (state_agg["total_students_affected"] / state_agg["total_students_affected"].max()) * 50
         )
     else:
@@ -141,41 +274,48 @@ def state_vulnerability_ranking(df: pd.DataFrame) -> pd.DataFrame:
     return state_agg
 
 
-def institution_resilience_analysis(df: pd.DataFrame) -> pd.DataFrame:
+def institution_resilience_analysis(
+    df: pd.DataFrame,
+    maxes: Optional[Dict[str, float]] = None
+) -> pd.DataFrame:
     """
     Analyze which institutions can absorb shocks (resilience analysis).
     
     Args:
         df: Input DataFrame
+        maxes: Optional precomputed component maxes from _component_maxes
     
     Returns:
         DataFrame with resilience scores
     """
-    resilience_components = []
+    if maxes is None:
+        maxes = {}
+    # Running sums instead of a stacked (n_rows, n_components) buffer
+    resilience_totals = np.zeros(len(df))
+    resilience_counts = np.zeros(len(df), dtype=np.uint8)
+    component = np.empty(len(df))
+    n_components = 0
     
     # Component 1: Large enrollment (more resilient)
-    # Try to find enrollment column (could be enrollment or total_enrollment)
-    enrollment_col = None
-    for col in ["enrollment", "total_enrollment", "total_enroll"]:
-        if col in df.columns:
-            enrollment_col = col
-            break
-    
+    enrollment_col = _enrollment_column(df)
     if enrollment_col:
-        if df[enrollment_col].max() > 0:
-            enrollment_resilience = (df[enrollment_col] / df[enrollment_col].max()) * 100
-        else:
-            enrollment_resilience = pd.Series(50, index=df.index)
-        resilience_components.append(enrollment_resilience)
+        enrollment = _float_values(df[enrollment_col])
+        _normalize_into(
+            component, enrollment, 50,
+            max_value=maxes.get("enrollment")
+        )
+        _add_component(resilience_totals, resilience_counts, component)
+        n_components += 1
     
     # Component 2: Low impact (more resilient)
     if "tuition_change_dollars" in df.columns:
-        impact = df["tuition_change_dollars"].abs()
-        if impact.max() > 0:
-            impact_resilience = (1 - (impact / impact.max())) * 100
-        else:
-            impact_resilience = pd.Series(100, index=df.index)
-        resilience_components.append(impact_resilience)
+        impact = np.abs(_float_values(df["tuition_change_dollars"]))
+        _normalize_into(
+            component, impact, 100, invert=True,
+            max_value=maxes.get("tuition_change_abs")
+        )
+        _add_component(resilience_totals, resilience_counts, component)
+        n_components += 1
     
     # Component 3: Institution type (private typically more resilient)
     if "institution_type" in df.columns:
@@ -184,20 +324,34 @@ def institution_resilience_analysis(df: pd.DataFrame) -> pd.DataFrame:
             "public": 60,
             "community": 40
         }
-        type_resilience = df["institution_type"].map(type_scores).fillna(50)
-        resilience_components.append(type_resilience)
+        institution_types = df["institution_type"].astype("category")
+        # One score per category, plus a trailing default picked up by code -1 (missing)
+        score_table = np.array(
+            [type_scores.get(category, 50) for category in institution_types.cat.categories] + [50],
+            dtype=np.float32
+        )
+        component[:] = score_table[institution_types.cat.codes.to_numpy()]
+        _add_component(resilience_totals, resilience_counts, component)
+        n_components += 1
     
     # Combine components
-    if resilience_components:
-        df["resilience_score"] = pd.concat(resilience_components, axis=1).mean(axis=1)
+    if n_components:
+        df["resilience_score"] = _composite_score(resilience_totals, resilience_counts)
     else:
         df["resilience_score"] = 50
     
-    # Rank by resilience
-    df = df.sort_values("resilience_score", ascending=False)
-    df["resilience_rank"] = range(1, len(df) + 1)
+    # Rank by resilience: select the top 20 in linear time, then sort only those
+    top_n = min(20, len(df))
+    scores = df["resilience_score"].to_numpy(dtype=np.float64)
+    sort_key = np.where(np.isnan(scores), np.inf, -scores)  # Descending, NaN last
+    if top_n < len(df):
+        top_idx = np.argpartition(sort_key, top_n - 1)[:top_n]
+    else:
+        top_idx = np.arange(len(df))
+    top_idx = top_idx[np.argsort(sort_key[top_idx], kind="stable")]
     
-    return df[["institution_id", "name", "resilience_score", "resilience_rank"]].head(20)
+    top = df.iloc[top_idx][["institution_id", "name", "resilience_score"]]
+    return top.assign(resilience_rank=np.arange(1, top_n + 1))
 
 
 def calculate_custom_metrics(df: pd.DataFrame, output_path: str = None) -> Dict:
@@ -215,8 +369,11 @@ def calculate_custom_metrics(df: pd.DataFrame, output_path: str = None) -> Dict:
     
     results = {}
     
+    # Column maxes shared by the impact and resilience scores, computed once
+    maxes = _component_maxes(df)
+    
     # Affordability impact score
-    df["affordability_impact_score"] = calculate_affordability_impact_score(df)
+    df["affordability_impact_score"] = calculate_affordability_impact_score(df, maxes)
     results["affordability_impact"] = {
         "mean": float(df["affordability_impact_score"].mean()),
         "median": float(df["affordability_impact_score"].median()),
@@ -232,18 +389,16 @@ def calculate_custom_metrics(df: pd.DataFrame, output_path: str = None) -> Dict:
         results["state_vulnerability"] = state_ranking.to_dict("records")
     
     # Institution resilience
-    resilience_df = institution_resilience_analysis(df)
+    resilience_df = institution_resilience_analysis(df, maxes)
     if not resilience_df.empty:
         results["most_resilient_institutions"] = resilience_df.to_dict("records")
     
     # Save if output path provided
     if output_path:
-        import json
         from pathlib import Path
         output_path_obj = Path(output_path)
         output_path_obj.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, "w") as f:
-            json.dump(results, f, indent=2, default=str)
+        write_json(results, output_path)
         logger.info(f"Custom metrics saved to {output_path}")
     
     return results
@@ -251,9 +406,14 @@ def calculate_custom_metrics(df: pd.DataFrame, output_path: str = None) -> Dict:
 
 if __name__ == "__main__":
     import sys
+    from pathlib import Path
+    from analysis.csv_analyzer import load_table
+    
     if len(sys.argv) > 1:
         csv_path = sys.argv[1]
-        df = pd.read_csv(csv_path)
+        cached_df, _ = load_table(csv_path)
+        # Shallow copy: new metric columns must not leak into the shared cache entry
+        df = cached_df.copy(deep=False)
         metrics = calculate_custom_metrics(df, f"outputs/analysis/{Path(csv_path).stem}_custom_metrics.json")
         print(f"Calculated custom metrics for {len(df)} colleges")
 
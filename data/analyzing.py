@@ -4,34 +4,298 @@ Data Quality Analysis for master_colleges.csv
 Checks data types, missing values, and data quality issues.
 """
 
+import csv
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
 
-def analyze_data_quality(csv_path: str = "data/master_colleges.csv"):
-    """Comprehensive data quality analysis."""
+# Add project root to path so we can import data module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from data.csv_processor import dedupe_column_names, load_master
+
+# Polars is optional; analyze_data_quality falls back to pandas without it
+try:
+    import polars as pl
+    POLARS_AVAILABLE = True
+except ImportError:
+    POLARS_AVAILABLE = False
+
+# Rows sampled when probing text columns for numeric content
+PROBE_SAMPLE_SIZE = 10_000
+
+
+def _load(source: Union[str, pd.DataFrame]) -> pd.DataFrame:
+    """Return source as-is if it is already a DataFrame, otherwise load it with load_master."""
+    if isinstance(source, pd.DataFrame):
+        return source
+    return load_master(source)
+
+
+def _is_numeric_dtype(dtype) -> bool:
+    """Numeric as select_dtypes(include=[np.number]) sees it (bools excluded)."""
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def _is_text_dtype(dtype) -> bool:
+    """Object, string or categorical columns."""
+    return (
+        pd.api.types.is_object_dtype(dtype)
+        or pd.api.types.is_string_dtype(dtype)
+        or isinstance(dtype, pd.CategoricalDtype)
+    )
+
+
+def _chunk_summary(chunk: pd.DataFrame, widen_numeric: bool = False) -> Dict:
+    """
+    Partial quality statistics for one chunk of rows (or a whole frame).
+    
+    Rows and ids are reduced to sets of 64-bit hashes so duplicates can be
+    counted across chunks without keeping the rows themselves.
+    
+    Args:
+        chunk: Rows to summarise
+        widen_numeric: Hash numeric columns as float64, so a value hashes the same
+                       in chunks where its column was parsed as int and as float
+    
+    Returns:
+        Dict of partial statistics, merged by _combine_summaries
+    """
+    object_cols = [col for col, dtype in chunk.dtypes.items() if _is_text_dtype(dtype)]
+    
+    # Probe a random sample of rows; the >50% decision needs no more than that
+    probe = chunk[object_cols]
+    if len(probe) > PROBE_SAMPLE_SIZE:
+        probe = probe.sample(n=PROBE_SAMPLE_SIZE, random_state=0)
+    probe_counts = {
+        col: (int(pd.to_numeric(probe[col], errors='coerce').notna().sum()), len(probe))
+        for col in object_cols
+    }
+    
+    hashed = chunk
+    if widen_numeric:
+        numeric_cols = [col for col, dtype in chunk.dtypes.items() if _is_numeric_dtype(dtype)]
+        hashed = chunk.astype({col: np.float64 for col in numeric_cols})
+    row_hashes = np.unique(pd.util.hash_pandas_object(hashed, index=False).to_numpy())
+    
+    id_col = next((col for col in ['institution_id', 'unit_id'] if col in chunk.columns), None)
+    id_hashes = None
+    if id_col:
+        id_hashes = np.unique(pd.util.hash_pandas_object(hashed[id_col], index=False).to_numpy())
+    
+    return {
+        'rows': len(chunk),
+        'dtypes': chunk.dtypes,
+        'memory_bytes': int(chunk.memory_usage(deep=True).sum()),
+        # One null mask per chunk; every missing-value summary derives from it
+        'missing': pd.Series(chunk.isna().to_numpy().sum(axis=0), index=chunk.columns),
+        'probe': probe_counts,
+        'row_hashes': row_hashes,
+        'id_col': id_col,
+        'id_hashes': id_hashes
+    }
+
+
+def _summarize_chunks(reader: Iterable[pd.DataFrame], workers: int) -> Iterator[Dict]:
+    """
+    Yield _chunk_summary results for each chunk, computed in worker processes.
+    
+    At most 2 * workers chunks are in flight, so memory stays bounded while
+    the reader keeps the workers busy.
+    
+    Args:
+        reader: Chunks from pd.read_csv(..., chunksize=...)
+        workers: Number of worker processes (1 runs in this process)
+    """
+    if workers <= 1:
+        for chunk in reader:
+            yield _chunk_summary(chunk, widen_numeric=True)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in reader:
+            pending.append(executor.submit(_chunk_summary, chunk, True))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _merge_dtypes(dtypes: List) -> object:
+    """One dtype for a column parsed differently across chunks."""
+    if all(dtype == dtypes[0] for dtype in dtypes):
+        return dtypes[0]
+    if all(_is_numeric_dtype(dtype) for dtype in dtypes):
+        return np.dtype(np.float64)
+    return np.dtype(object)
+
+
+def _combine_summaries(summaries: Iterable[Dict]) -> Dict:
+    """
+    Merge per-chunk summaries into whole-dataset statistics.
+    
+    Args:
+        summaries: Summaries from _chunk_summary, all with the same columns
+    
+    Returns:
+        Dict with rows, dtypes, memory_bytes, missing, probe, duplicate_rows,
+        id_col and duplicate_ids
+    """
+    rows = 0
+    memory_bytes = 0
+    missing = None
+    column_dtypes = {}
+    probe = {}
+    row_hashes = []
+    id_col = None
+    id_hashes = []
+    
+    for summary in summaries:
+        rows += summary['rows']
+        memory_bytes += summary['memory_bytes']
+        missing = summary['missing'] if missing is None else missing + summary['missing']
+        for col, dtype in summary['dtypes'].items():
+            column_dtypes.setdefault(col, []).append(dtype)
+        for col, (numeric_count, probed) in summary['probe'].items():
+            totals = probe.setdefault(col, [0, 0])
+            totals[0] += numeric_count
+            totals[1] += probed
+        row_hashes.append(summary['row_hashes'])
+        id_col = summary['id_col']
+        if summary['id_hashes'] is not None:
+            id_hashes.append(summary['id_hashes'])
+    
+    # Duplicates are rows (ids) beyond the first occurrence of each distinct hash
+    distinct_rows = len(np.unique(np.concatenate(row_hashes))) if row_hashes else 0
+    distinct_ids = len(np.unique(np.concatenate(id_hashes))) if id_hashes else 0
+    
+    return {
+        'rows': rows,
+        'dtypes': pd.Series({col: _merge_dtypes(dtypes) for col, dtypes in column_dtypes.items()}, dtype=object),
+        'memory_bytes': memory_bytes,
+        'missing': missing if missing is not None else pd.Series(dtype=np.int64),
+        'probe': probe,
+        'duplicate_rows': rows - distinct_rows,
+        'id_col': id_col,
+        'duplicate_ids': rows - distinct_ids if id_col else 0
+    }
+
+
+def _polars_dtype_to_numpy(dtype) -> np.dtype:
+    """Nearest NumPy dtype for a Polars column dtype, for the report's dtype checks."""
+    if dtype.is_integer():
+        return np.dtype(np.int64)
+    if dtype.is_float():
+        return np.dtype(np.float64)
+    if dtype == pl.Boolean:
+        return np.dtype(bool)
+    return np.dtype(object)
+
+
+def _polars_summary(csv_path: str) -> Dict:
+    """
+    Whole-dataset statistics from a lazy Polars scan of a CSV.
+    
+    Only the aggregates the report prints are collected (null counts, numeric
+    probe counts, row and distinct counts), so the rows are never materialised
+    as a frame. Text columns are probed on every row, which is cheap here.
+    
+    Args:
+        csv_path: Path to the CSV file
+    
+    Returns:
+        Dict in the format returned by _combine_summaries (memory_bytes is None)
+    """
+    # Name repeated headers the way the pandas C parser does
+    with open(csv_path, newline="") as f:
+        header = next(csv.reader(f))
+    lf = pl.scan_csv(csv_path, new_columns=dedupe_column_names(header), infer_schema_length=None)
+    schema = lf.collect_schema()
+    columns = schema.names()
+    text_cols = [col for col, dtype in schema.items() if dtype == pl.String]
+    id_col = next((col for col in ['institution_id', 'unit_id'] if col in schema), None)
+    
+    exprs = [pl.len().alias("rows"), pl.struct(pl.all()).n_unique().alias("distinct_rows")]
+    if id_col:
+        exprs.append(pl.col(id_col).n_unique().alias("distinct_ids"))
+    exprs += [pl.col(col).null_count().alias(f"missing_{i}") for i, col in enumerate(columns)]
+    exprs += [
+        pl.col(col).cast(pl.Float64, strict=False).is_not_null().sum().alias(f"numeric_{i}")
+        for i, col in enumerate(text_cols)
+    ]
+    result = lf.select(exprs).collect(engine="streaming").row(0, named=True)
+    
+    rows = result["rows"]
+    return {
+        'rows': rows,
+        'dtypes': pd.Series({col: _polars_dtype_to_numpy(dtype) for col, dtype in schema.items()}, dtype=object),
+        'memory_bytes': None,
+        'missing': pd.Series([result[f"missing_{i}"] for i in range(len(columns))], index=columns, dtype=np.int64),
+        'probe': {col: (result[f"numeric_{i}"], rows) for i, col in enumerate(text_cols)},
+        'duplicate_rows': rows - result["distinct_rows"],
+        'id_col': id_col,
+        'duplicate_ids': rows - result["distinct_ids"] if id_col else 0
+    }
+
+
+def analyze_data_quality(
+    source: Union[str, pd.DataFrame] = "data/master_colleges.csv",
+    chunksize: Optional[int] = None,
+    use_polars: bool = False,
+    workers: Optional[int] = None
+):
+    """
+    Comprehensive data quality analysis.
+    
+    source is a CSV path or a loaded DataFrame. With a path and chunksize, the
+    CSV is streamed in chunks of that many rows so memory stays bounded by one
+    chunk plus the row hashes; with a path and use_polars, it is scanned lazily
+    with Polars (when installed) and only the report's aggregates are collected.
+    Otherwise it is loaded whole. Chunks are summarised in parallel across
+    workers processes (defaults to the CPU count).
+    """
     
     print("=" * 80)
     print("DATA QUALITY ANALYSIS: master_colleges.csv")
     print("=" * 80)
     
     # Load data
-    df = pd.read_csv(csv_path)
+    if use_polars and not POLARS_AVAILABLE:
+        print("   [INFO] Polars is not installed; using pandas")
+    if use_polars and POLARS_AVAILABLE and not isinstance(source, pd.DataFrame):
+        stats = _polars_summary(source)
+    elif chunksize is not None and not isinstance(source, pd.DataFrame):
+        reader = pd.read_csv(source, chunksize=chunksize, engine="c", low_memory=False)
+        stats = _combine_summaries(_summarize_chunks(reader, workers or os.cpu_count() or 1))
+    else:
+        stats = _combine_summaries([_chunk_summary(_load(source))])
+    
+    n_rows = stats['rows']
+    columns = stats['dtypes'].index
+    missing = stats['missing']
     
     print(f"\n[OVERVIEW] DATASET OVERVIEW")
-    print(f"   Shape: {df.shape[0]:,} rows × {df.shape[1]} columns")
-    print(f"   Memory usage: {df.memory_usage(deep=True).sum() / 1024**2:.2f} MB")
+    print(f"   Shape: {n_rows:,} rows × {len(columns)} columns")
+    if stats['memory_bytes'] is not None:
+        print(f"   Memory usage: {stats['memory_bytes'] / 1024**2:.2f} MB")
+    else:
+        print(f"   Memory usage: n/a (lazy scan, rows not loaded)")
     
     # Data types
     print(f"\n[DATA TYPES]")
-    dtype_counts = df.dtypes.value_counts()
+    dtype_counts = stats['dtypes'].astype(str).value_counts()  # Count all categoricals together
     for dtype, count in dtype_counts.items():
         print(f"   {dtype}: {count} columns")
     
     # Missing values analysis
     print(f"\n[MISSING VALUES] MISSING VALUES ANALYSIS")
-    missing = df.isnull().sum()
-    missing_pct = (missing / len(df)) * 100
+    missing_pct = (missing / n_rows) * 100
     
     # Columns with missing values
     cols_with_missing = missing[missing > 0].sort_values(ascending=False)
@@ -51,8 +315,8 @@ def analyze_data_quality(csv_path: str = "data/master_colleges.csv"):
     print(f"\n[DATA TYPE ANALYSIS]")
     
     # Check for numeric columns that might be strings
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    object_cols = df.select_dtypes(include=['object']).columns
+    numeric_cols = [col for col, dtype in stats['dtypes'].items() if _is_numeric_dtype(dtype)]
+    object_cols = [col for col, dtype in stats['dtypes'].items() if _is_text_dtype(dtype)]
     
     print(f"   Numeric columns: {len(numeric_cols)}")
     print(f"   Object/string columns: {len(object_cols)}")
@@ -61,11 +325,10 @@ def analyze_data_quality(csv_path: str = "data/master_colleges.csv"):
     print(f"\n   Potential data type issues:")
     issues_found = False
     for col in object_cols:
-        # Try to convert to numeric
-        numeric_series = pd.to_numeric(df[col], errors='coerce')
-        non_null_count = numeric_series.notna().sum()
-        if non_null_count > len(df) * 0.5:  # More than 50% can be converted
-            print(f"   [WARNING] '{col}' is object type but {non_null_count:,}/{len(df):,} values are numeric")
+        non_null_count, probed = stats['probe'].get(col, (0, 0))
+        if non_null_count > probed * 0.5:  # More than 50% can be converted
+            sampled = " sampled" if probed < n_rows else ""
+            print(f"   [WARNING] '{col}' is object type but {non_null_count:,}/{probed:,}{sampled} values are numeric")
             issues_found = True
     
     if not issues_found:
@@ -73,16 +336,16 @@ def analyze_data_quality(csv_path: str = "data/master_colleges.csv"):
     
     # Check for duplicate rows
     print(f"\n[DUPLICATE ANALYSIS]")
-    duplicate_rows = df.duplicated().sum()
+    duplicate_rows = stats['duplicate_rows']
     if duplicate_rows > 0:
         print(f"   [WARNING] Found {duplicate_rows:,} duplicate rows")
     else:
         print(f"   [OK] No duplicate rows found")
     
     # Check for duplicate institution IDs
-    if 'institution_id' in df.columns or 'unit_id' in df.columns:
-        id_col = 'institution_id' if 'institution_id' in df.columns else 'unit_id'
-        duplicate_ids = df[id_col].duplicated().sum()
+    if stats['id_col']:
+        id_col = stats['id_col']
+        duplicate_ids = stats['duplicate_ids']
         if duplicate_ids > 0:
             print(f"   [WARNING] Found {duplicate_ids:,} duplicate {id_col} values")
         else:
@@ -90,7 +353,7 @@ def analyze_data_quality(csv_path: str = "data/master_colleges.csv"):
     
     # Check for columns with all missing values
     print(f"\n[EMPTY COLUMNS]")
-    empty_cols = df.columns[df.isnull().all()].tolist()
+    empty_cols = columns[(missing == n_rows).to_numpy()].tolist()
     if empty_cols:
         print(f"   [WARNING] Found {len(empty_cols)} completely empty columns:")
         for col in empty_cols:
@@ -104,20 +367,20 @@ def analyze_data_quality(csv_path: str = "data/master_colleges.csv"):
         print(f"   Analyzing {len(numeric_cols)} numeric columns...")
         # Show columns with high missing rates
         numeric_missing = missing[numeric_cols]
-        high_missing_numeric = numeric_missing[(numeric_missing / len(df)) > 0.5].sort_values(ascending=False)
+        high_missing_numeric = numeric_missing[(numeric_missing / n_rows) > 0.5].sort_values(ascending=False)
         if len(high_missing_numeric) > 0:
             print(f"\n   Numeric columns with >50% missing values:")
             for col, count in high_missing_numeric.head(10).items():
-                pct = (count / len(df)) * 100
+                pct = (count / n_rows) * 100
                 print(f"      - {col}: {count:,} missing ({pct:.1f}%)")
     
     # Key columns check
     print(f"\n[KEY COLUMNS] KEY COLUMNS CHECK")
     key_cols = ['institution_id', 'unit_id', 'institution_name', 'state', 'state_abbreviation']
-    found_key_cols = [col for col in key_cols if col in df.columns]
+    found_key_cols = [col for col in key_cols if col in columns]
     print(f"   Key columns found: {found_key_cols}")
     for col in found_key_cols:
-        missing_count = df[col].isnull().sum()
+        missing_count = missing[col]
         if missing_count > 0:
             print(f"   [WARNING] '{col}' has {missing_count:,} missing values")
         else:
@@ -125,8 +388,8 @@ def analyze_data_quality(csv_path: str = "data/master_colleges.csv"):
     
     # Overall quality score
     print(f"\n[QUALITY SCORE] OVERALL QUALITY SCORE")
-    total_cells = df.shape[0] * df.shape[1]
-    missing_cells = df.isnull().sum().sum()
+    total_cells = n_rows * len(columns)
+    missing_cells = int(missing.sum())
     completeness = (1 - missing_cells / total_cells) * 100
     
     print(f"   Data completeness: {completeness:.2f}%")
@@ -149,7 +412,7 @@ def analyze_data_quality(csv_path: str = "data/master_colleges.csv"):
     print("=" * 80)
     
     return {
-        'shape': df.shape,
+        'shape': (n_rows, len(columns)),
         'missing_summary': cols_with_missing.to_dict() if len(cols_with_missing) > 0 else {},
         'completeness': completeness,
         'quality_rating': quality_rating,
@@ -158,11 +421,13 @@ def analyze_data_quality(csv_path: str = "data/master_colleges.csv"):
     }
 
 
-def analyze_duplicate_unit_ids(csv_path: str = "data/master_colleges.csv"):
+def analyze_duplicate_unit_ids(source: Union[str, pd.DataFrame] = "data/master_colleges.csv"):
     """
     Analyze duplicate unit_ids to determine if they are:
     1. True duplicate rows (same data)
     2. Same institution with different reports/data
+    
+    source is a CSV path or an already loaded DataFrame.
     """
     
     print("=" * 80)
@@ -170,7 +435,7 @@ def analyze_duplicate_unit_ids(csv_path: str = "data/master_colleges.csv"):
     print("=" * 80)
     
     # Load data
-    df = pd.read_csv(csv_path)
+    df = _load(source)
     
     # Check if unit_id exists
     if 'unit_id' not in df.columns:
@@ -194,6 +459,16 @@ def analyze_duplicate_unit_ids(csv_path: str = "data/master_colleges.csv"):
     # Analyze each duplicate unit_id
     print(f"\n[ANALYSIS] Analyzing duplicate unit_ids...")
     
+    other_cols = [col for col in df.columns if col != 'unit_id']
+    
+    # Distinct rows per duplicated unit_id: hash each row's other columns once, then
+    # a unit_id is a true duplicate when all of its rows share a single hash
+    row_hashes = pd.util.hash_pandas_object(duplicate_ids[other_cols], index=False)
+    distinct_rows = row_hashes.groupby(duplicate_ids['unit_id']).nunique()
+    
+    # Row positions per unit_id, built once so each lookup below avoids a full-column scan
+    row_positions = df.groupby('unit_id', sort=False).indices
+    
     true_duplicates = 0
     different_records = 0
     sample_duplicates = []
@@ -202,47 +477,37 @@ def analyze_duplicate_unit_ids(csv_path: str = "data/master_colleges.csv"):
     sample_size = min(10, len(unique_unit_ids_with_duplicates))
     
     for unit_id in unique_unit_ids_with_duplicates[:sample_size]:
-        rows = df[df['unit_id'] == unit_id].copy()
+        positions = row_positions.get(unit_id)
+        if positions is None:  # Missing unit_id
+            continue
+        rows = df.iloc[positions]
         
-        if len(rows) > 1:
-            # Check if rows are identical (excluding unit_id itself)
-            other_cols = [col for col in df.columns if col != 'unit_id']
-            
-            # Compare rows pairwise
-            is_identical = True
-            differences = []
-            
-            for i in range(len(rows)):
-                for j in range(i + 1, len(rows)):
-                    row1 = rows.iloc[i][other_cols]
-                    row2 = rows.iloc[j][other_cols]
-                    
-                    # Check for differences
-                    diff_cols = row1[row1 != row2].index.tolist()
-                    if diff_cols:
-                        is_identical = False
-                        differences.append({
-                            'row_pair': (i, j),
-                            'different_columns': diff_cols,
-                            'num_differences': len(diff_cols)
-                        })
-            
-            if is_identical:
-                true_duplicates += 1
-                sample_duplicates.append({
-                    'unit_id': unit_id,
-                    'type': 'true_duplicate',
-                    'num_rows': len(rows),
-                    'differences': None
-                })
-            else:
-                different_records += 1
-                sample_duplicates.append({
-                    'unit_id': unit_id,
-                    'type': 'different_records',
-                    'num_rows': len(rows),
-                    'differences': differences[0] if differences else None
-                })
+        if distinct_rows[unit_id] == 1:
+            true_duplicates += 1
+            sample_duplicates.append({
+                'unit_id': unit_id,
+                'type': 'true_duplicate',
+                'num_rows': len(rows),
+                'differences': None
+            })
+        else:
+            # First differing pair is (0, j) for the first row j that differs from row 0
+            values = rows[other_cols]
+            first = values.iloc[0]
+            differs = values.ne(first) & ~(values.isna() & first.isna())
+            j = int(np.argmax(differs.any(axis=1).to_numpy()))
+            diff_cols = differs.columns[differs.iloc[j].to_numpy()].tolist()
+            different_records += 1
+            sample_duplicates.append({
+                'unit_id': unit_id,
+                'type': 'different_records',
+                'num_rows': len(rows),
+                'differences': {
+                    'row_pair': (0, j),
+                    'different_columns': diff_cols,
+                    'num_differences': len(diff_cols)
+                }
+            })
     
     # Full analysis - count all duplicates
     print(f"\n[DETAILED ANALYSIS] Sample of {sample_size} duplicate unit_ids:")
@@ -265,26 +530,8 @@ def analyze_duplicate_unit_ids(csv_path: str = "data/master_colleges.csv"):
     print(f"\n[FULL DATASET ANALYSIS]")
     
     # Count how many unit_ids have truly identical rows vs different data
-    all_true_duplicates = 0
-    all_different_records = 0
-    
-    for unit_id in unique_unit_ids_with_duplicates:
-        rows = df[df['unit_id'] == unit_id]
-        if len(rows) > 1:
-            # Check if all rows are identical (excluding unit_id)
-            other_cols = [col for col in df.columns if col != 'unit_id']
-            first_row = rows.iloc[0][other_cols]
-            
-            all_identical = True
-            for idx in range(1, len(rows)):
-                if not rows.iloc[idx][other_cols].equals(first_row):
-                    all_identical = False
-                    break
-            
-            if all_identical:
-                all_true_duplicates += 1
-            else:
-                all_different_records += 1
+    all_true_duplicates = int((distinct_rows == 1).sum())
+    all_different_records = int((distinct_rows > 1).sum())
     
     print(f"   unit_ids with identical rows (true duplicates): {all_true_duplicates:,}")
     print(f"   unit_ids with different data (different reports): {all_different_records:,}")
@@ -293,18 +540,15 @@ def analyze_duplicate_unit_ids(csv_path: str = "data/master_colleges.csv"):
     print(f"\n[EXAMPLE DIFFERENCES]")
     example_found = False
     for unit_id in unique_unit_ids_with_duplicates[:5]:
-        rows = df[df['unit_id'] == unit_id]
-        if len(rows) > 1:
-            other_cols = [col for col in df.columns if col != 'unit_id']
-            first_row = rows.iloc[0]
-            second_row = rows.iloc[1]
+        positions = row_positions.get(unit_id)
+        if positions is not None and len(positions) > 1:
+            rows = df.iloc[positions]
+            first_row = rows[other_cols].iloc[0]
+            second_row = rows[other_cols].iloc[1]
             
-            diff_cols = []
-            for col in other_cols:
-                if pd.isna(first_row[col]) and pd.isna(second_row[col]):
-                    continue
-                if first_row[col] != second_row[col]:
-                    diff_cols.append(col)
+            both_missing = first_row.isna().to_numpy() & second_row.isna().to_numpy()
+            differs = (first_row.to_numpy() != second_row.to_numpy()) & ~both_missing
+            diff_cols = first_row.index[differs].tolist()
             
             if diff_cols:
                 example_found = True
@@ -361,6 +605,8 @@ def analyze_duplicate_unit_ids(csv_path: str = "data/master_colleges.csv"):
 
 
 if __name__ == "__main__":
-    analyze_data_quality()
+    # Parse the CSV once and share it between both analyses
+    df = _load("data/master_colleges.csv")
+    analyze_data_quality(df)
     print("\n")
-    analyze_duplicate_unit_ids()
+    analyze_duplicate_unit_ids(df)
@@ -11,7 +11,7 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from data.csv_processor import build_master_colleges
+from data.csv_processor import build_master_colleges, write_master
 from data.custom_analysis import enhance_master_colleges
 from data.quality_checker import quality_checks
 import logging
@@ -46,7 +46,7 @@ def main():
     enhanced_df = enhance_master_colleges(master_df)
     
     # Save enhanced version
-    enhanced_df.to_csv("data/master_colleges.csv", index=False)
+    write_master(enhanced_df, "data/master_colleges.csv")
     logger.info("Master colleges dataset complete!")
     logger.info(f"Final shape: {enhanced_df.shape}")
     logger.info(f"Quality score: {quality_report['overall_quality_score']}/100")
@@ -4,17 +4,139 @@ Synthetic Training Data Generator
 Purpose: Generate 1000+ realistic training scenarios using Monte Carlo + economic theory
 """
 
+import sys
 import pandas as pd
 import numpy as np
 from pathlib import Path
 import os
-from typing import Optional
+from typing import Dict, List, Optional
 import logging
 
+# Add project root to path so we can import data module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from data.csv_processor import load_master, PYARROW_AVAILABLE
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _first_column(df: pd.DataFrame, columns: List[str]) -> Optional[str]:
+    """First of columns present in df (None when none is)."""
+    return next((col for col in columns if col in df.columns), None)
+
+
+def _numeric_values(df: pd.DataFrame, col: str, positions: np.ndarray) -> np.ndarray:
+    """Column values at the given row positions as float64, NaN where missing or non-numeric."""
+    values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    return values[positions]
+
+
+def _college_attribute(
+    df: pd.DataFrame,
+    positions: np.ndarray,
+    col: Optional[str],
+    default: float
+) -> np.ndarray:
+    """
+    Numeric attribute of the sampled colleges, with missing values set to default.
+    
+    Args:
+        df: Master colleges dataset
+        positions: Row positions of the sampled colleges
+        col: Column supplying the attribute (None when the dataset has none)
+        default: Value used when the column is absent or a value is missing
+    
+    Returns:
+        float64 array with one value per sampled college
+    """
+    if col is None:
+        return np.full(len(positions), default, dtype=np.float64)
+    values = _numeric_values(df, col, positions)
+    return np.where(np.isnan(values), default, values)
+
+
+def _compute_outcomes(
+    baseline_tuition: np.ndarray,
+    pct_low_income: np.ndarray,
+    pct_minority: np.ndarray,
+    is_public: np.ndarray,
+    funding_change_pct: np.ndarray,
+    min_wage_change: np.ndarray,
+    childcare_subsidy: np.ndarray,
+    tuition_cap_pct: np.ndarray,
+    tuition_noise: np.ndarray,
+    enrollment_elasticity: np.ndarray,
+    enrollment_noise: np.ndarray,
+    grad_stress_factor: np.ndarray,
+    grad_noise: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Economic outcome model, evaluated for every scenario at once.
+    
+    All inputs are float64 arrays of equal length (is_public is boolean) with
+    defaults already applied; random draws are made by the caller so the
+    kernel itself is deterministic.
+    
+    Returns:
+        Dict with tuition_change_pct, enrollment_change_pct, grad_rate_change
+        and equity_risk_score arrays
+    """
+    # 1. Tuition Change
+    # Public colleges: 60% dependent on state funding
+    # Private colleges: 20% dependent
+    tuition_change_pct = funding_change_pct * np.where(is_public, 0.6, 0.2)
+    
+    # A non-zero tuition cap limits the change
+    capped = tuition_cap_pct != 0
+    np.minimum(tuition_change_pct, tuition_cap_pct, out=tuition_change_pct, where=capped)
+    
+    # Add noise
+    tuition_change_pct += tuition_noise
+    
+    # 2. Enrollment Change
+    # Every $1000 tuition increase → 2-5% enrollment drop for low-income students
+    tuition_change_dollars = baseline_tuition * tuition_change_pct / 100
+    enrollment_change_pct = tuition_change_dollars / 1000
+    enrollment_change_pct *= enrollment_elasticity
+    enrollment_change_pct *= -100
+    
+    # Min wage and childcare help; each $1 wage = 0.5% enrollment boost, each $1000 subsidy = 0.3%
+    wage_gain = np.maximum(min_wage_change, 0)
+    subsidy_thousands = np.maximum(childcare_subsidy, 0) / 1000
+    enrollment_change_pct += wage_gain * 0.5
+    enrollment_change_pct += subsidy_thousands * 0.3
+    
+    # Add noise
+    enrollment_change_pct += enrollment_noise
+    
+    # 3. Graduation Rate Change
+    # Financial stress → 1-3% graduation rate decline (baseline tuition is always positive)
+    abs_tuition_change = np.abs(tuition_change_dollars)
+    grad_rate_change = abs_tuition_change / baseline_tuition
+    grad_rate_change *= -grad_stress_factor
+    
+    # Min wage and childcare help (each $1 = 0.1%, each $1000 = 0.05% boost)
+    grad_rate_change += wage_gain * 0.1
+    grad_rate_change += subsidy_thousands * 0.05
+    
+    # Add noise
+    grad_rate_change += grad_noise
+    
+    # 4. Equity Risk Score
+    # Composite based on demographics + affordability stress (max $2000 impact = 30 points)
+    equity_risk_score = (pct_low_income / 100) * 40 + (pct_minority / 100) * 30
+    equity_risk_score += np.minimum(abs_tuition_change / 2000, 1) * 30
+    np.clip(equity_risk_score, 0, 100, out=equity_risk_score)
+    
+    return {
+        "tuition_change_pct": tuition_change_pct,
+        "enrollment_change_pct": enrollment_change_pct,
+        "grad_rate_change": grad_rate_change,
+        "equity_risk_score": equity_risk_score
+    }
+
+
 def generate_synthetic_scenarios(
     master_colleges_df: pd.DataFrame,
     n_scenarios: int = 1000,
@@ -23,6 +145,8 @@ def generate_synthetic_scenarios(
     """
     Generate synthetic training scenarios.
     
+    All scenarios are computed at once with array arithmetic, one element per scenario.
+    
     Args:
         master_colleges_df: Master colleges dataset
         n_scenarios: Number of scenarios to generate
@@ -31,151 +155,93 @@ def generate_synthetic_scenarios(
     Returns:
         DataFrame with synthetic training data
     """
-    np.random.seed(random_seed)
-    
-    scenarios = []
+    rng = np.random.default_rng(random_seed)
+    n = n_scenarios
     
     # Sample colleges (with replacement to get n_scenarios)
-    college_indices = np.random.choice(len(master_colleges_df), size=n_scenarios, replace=True)
+    college_indices = rng.choice(len(master_colleges_df), size=n, replace=True)
     
-    for i, college_idx in enumerate(college_indices):
-        college = master_colleges_df.iloc[college_idx].copy()
-        
-        # Sample policy parameters from distributions
-        funding_change_pct = np.random.uniform(-20, 10)  # More cuts than increases
-        min_wage_change = np.random.uniform(-2, 5)  # Wage changes in dollars
-        childcare_subsidy = np.random.uniform(0, 5000)  # Subsidy amount
-        tuition_cap_pct = np.random.uniform(-10, 20)  # Tuition cap changes
-        
-        # Get college attributes
-        baseline_tuition = college.get("net_price", college.get("tuition", 10000))
-        if pd.isna(baseline_tuition) or baseline_tuition <= 0:
-            baseline_tuition = 10000  # Default
-        
-        # Try multiple column names for enrollment
-        enrollment = college.get("enrollment") or college.get("total_enrollment") or college.get("total_enroll")
-        if pd.isna(enrollment) or enrollment <= 0:
-            enrollment = 5000  # Default
-        
-        pct_low_income = college.get("pct_low_income", college.get("pell_pct", 30))
-        if pd.isna(pct_low_income):
-            pct_low_income = 30  # Default
-        
-        pct_minority = college.get("pct_minority", 25)
-        if pd.isna(pct_minority):
-            pct_minority = 25  # Default
-        
-        baseline_grad_rate = college.get("grad_rate", college.get("graduation_rate", 60))
-        if pd.isna(baseline_grad_rate):
-            baseline_grad_rate = 60  # Default
-        
-        institution_type = college.get("institution_type", "public")
-        state = college.get("state", "CA")
-        
-        # Calculate outcomes using economic elasticities
-        
-        # 1. Tuition Change
-        # Public colleges: 60% dependent on state funding
-        # Private colleges: 20% dependent
-        if institution_type.lower() in ["public", "community"]:
-            funding_dependency = 0.6
-        else:
-            funding_dependency = 0.2
-        
-        # Base tuition change from funding
-        tuition_change_from_funding = funding_change_pct * funding_dependency
-        
-        # Add effect of tuition cap
-        if tuition_cap_pct != 0:
-            # Cap limits the change
-            if tuition_change_from_funding > tuition_cap_pct:
-                tuition_change_pct = tuition_cap_pct
-            else:
-                tuition_change_pct = tuition_change_from_funding
-        else:
-            tuition_change_pct = tuition_change_from_funding
-        
-        # Add noise
-        tuition_change_pct += np.random.normal(0, 1.5)  # σ = 1.5%
-        
-        # 2. Enrollment Change
-        # Every $1000 tuition increase → 2-5% enrollment drop for low-income students
-        tuition_change_dollars = (baseline_tuition * tuition_change_pct) / 100
-        enrollment_elasticity = np.random.uniform(0.02, 0.05)  # Per $1000
-        enrollment_change_pct = -(tuition_change_dollars / 1000) * enrollment_elasticity * 100
-        
-        # Min wage increase helps (reduces enrollment drop)
-        if min_wage_change > 0:
-            enrollment_boost = min_wage_change * 0.5  # Each $1 wage increase = 0.5% enrollment boost
-            enrollment_change_pct += enrollment_boost
-        
-        # Childcare subsidy helps (especially for student-parents)
-        if childcare_subsidy > 0:
-            enrollment_boost = (childcare_subsidy / 1000) * 0.3  # Each $1000 = 0.3% boost
-            enrollment_change_pct += enrollment_boost
-        
-        # Add noise
-        enrollment_change_pct += np.random.normal(0, 2.0)  # σ = 2%
-        
-        # 3. Graduation Rate Change
-        # Financial stress → 1-3% graduation rate decline
-        affordability_stress = abs(tuition_change_dollars) / baseline_tuition if baseline_tuition > 0 else 0
-        grad_rate_change = -affordability_stress * np.random.uniform(1, 3)
-        
-        # Min wage and childcare help (reduce stress)
-        if min_wage_change > 0:
-            grad_rate_change += min_wage_change * 0.1  # Each $1 = 0.1% boost
-        if childcare_subsidy > 0:
-            grad_rate_change += (childcare_subsidy / 1000) * 0.05  # Each $1000 = 0.05% boost
-        
-        # Add noise
-        grad_rate_change += np.random.normal(0, 1.0)  # σ = 1%
-        
-        # 4. Equity Risk Score
-        # Composite based on demographics + affordability stress
-        demographic_risk = (pct_low_income / 100) * 40 + (pct_minority / 100) * 30
-        financial_stress_risk = min(abs(tuition_change_dollars) / 2000, 1) * 30  # Max $2000 impact = 30 points
-        
-        equity_risk_score = demographic_risk + financial_stress_risk
-        equity_risk_score = min(100, max(0, equity_risk_score))  # Clip to 0-100
-        
-        # Classify equity risk
-        if equity_risk_score <= 33:
-            equity_risk_class = "Low"
-        elif equity_risk_score <= 66:
-            equity_risk_class = "Medium"
-        else:
-            equity_risk_class = "High"
-        
-        # Create scenario row
-        scenario = {
-            # Features (inputs)
-            "funding_change_pct": funding_change_pct,
-            "min_wage_change": min_wage_change,
-            "childcare_subsidy": childcare_subsidy,
-            "tuition_cap_pct": tuition_cap_pct,
-            "state": state,
-            "institution_type": institution_type,
-            "enrollment": enrollment,
-            "pct_low_income": pct_low_income,
-            "pct_minority": pct_minority,
-            "baseline_tuition": baseline_tuition,
-            "baseline_grad_rate": baseline_grad_rate,
-            
-            # Targets (outputs)
-            "tuition_change_pct": tuition_change_pct,
-            "enrollment_change_pct": enrollment_change_pct,
-            "grad_rate_change": grad_rate_change,
-            "equity_risk_score": equity_risk_score,
-            "equity_risk_class": equity_risk_class
-        }
-        
-        scenarios.append(scenario)
-        
-        if (i + 1) % 100 == 0:
-            logger.info(f"Generated {i + 1}/{n_scenarios} scenarios...")
+    # Sample policy parameters from distributions
+    funding_change_pct = rng.uniform(-20, 10, n)  # More cuts than increases
+    min_wage_change = rng.uniform(-2, 5, n)  # Wage changes in dollars
+    childcare_subsidy = rng.uniform(0, 5000, n)  # Subsidy amount
+    tuition_cap_pct = rng.uniform(-10, 20, n)  # Tuition cap changes
+    
+    # Model noise and elasticities, one draw per scenario
+    tuition_noise = rng.normal(0, 1.5, n)  # σ = 1.5%
+    enrollment_elasticity = rng.uniform(0.02, 0.05, n)  # Per $1000
+    enrollment_noise = rng.normal(0, 2.0, n)  # σ = 2%
+    grad_stress_factor = rng.uniform(1, 3, n)
+    grad_noise = rng.normal(0, 1.0, n)  # σ = 1%
+    
+    # Get college attributes: resolve each source column once, then gather only
+    # that column at the sampled positions
+    master = master_colleges_df
+    tuition_col = _first_column(master, ["net_price", "tuition"])
+    low_income_col = _first_column(master, ["pct_low_income", "pell_pct"])
+    minority_col = _first_column(master, ["pct_minority"])
+    grad_rate_col = _first_column(master, ["grad_rate", "graduation_rate"])
+    enrollment_cols = [col for col in ["enrollment", "total_enrollment", "total_enroll"] if col in master.columns]
+    
+    baseline_tuition = _college_attribute(master, college_indices, tuition_col, 10000)
+    baseline_tuition = np.where(baseline_tuition <= 0, 10000, baseline_tuition)  # Default
     
-    training_df = pd.DataFrame(scenarios)
+    # Try multiple column names for enrollment: the first non-zero value wins
+    enrollment = np.full(n, np.nan)
+    for col in reversed(enrollment_cols):
+        values = _numeric_values(master, col, college_indices)
+        enrollment = np.where(values != 0, values, enrollment)
+    enrollment = np.where(np.isnan(enrollment) | (enrollment <= 0), 5000, enrollment)  # Default
+    
+    pct_low_income = _college_attribute(master, college_indices, low_income_col, 30)
+    pct_minority = _college_attribute(master, college_indices, minority_col, 25)
+    baseline_grad_rate = _college_attribute(master, college_indices, grad_rate_col, 60)
+    
+    if "institution_type" in master.columns:
+        institution_types = master["institution_type"]
+        institution_type = institution_types.to_numpy()[college_indices]
+        # Public test evaluated once per college, not once per scenario
+        is_public = institution_types.astype(str).str.lower().isin(["public", "community"]).to_numpy()[college_indices]
+    else:
+        institution_type = np.full(n, "public", dtype=object)
+        is_public = np.ones(n, dtype=bool)
+    if "state" in master.columns:
+        state = master["state"].to_numpy()[college_indices]
+    else:
+        state = np.full(n, "CA", dtype=object)
+    
+    # Calculate outcomes using economic elasticities
+    outcomes = _compute_outcomes(
+        baseline_tuition, pct_low_income, pct_minority, is_public,
+        funding_change_pct, min_wage_change, childcare_subsidy, tuition_cap_pct,
+        tuition_noise, enrollment_elasticity, enrollment_noise, grad_stress_factor, grad_noise
+    )
+    
+    # Classify equity risk: <=33 Low, <=66 Medium, otherwise High
+    risk_labels = np.array(["Low", "Medium", "High"], dtype=object)
+    equity_risk_class = risk_labels[np.digitize(outcomes["equity_risk_score"], [33, 66], right=True)]
+    
+    training_df = pd.DataFrame({
+        # Features (inputs)
+        "funding_change_pct": funding_change_pct,
+        "min_wage_change": min_wage_change,
+        "childcare_subsidy": childcare_subsidy,
+        "tuition_cap_pct": tuition_cap_pct,
+        "state": state,
+        "institution_type": institution_type,
+        "enrollment": enrollment,
+        "pct_low_income": pct_low_income,
+        "pct_minority": pct_minority,
+        "baseline_tuition": baseline_tuition,
+        "baseline_grad_rate": baseline_grad_rate,
+        
+        # Targets (outputs)
+        "tuition_change_pct": outcomes["tuition_change_pct"],
+        "enrollment_change_pct": outcomes["enrollment_change_pct"],
+        "grad_rate_change": outcomes["grad_rate_change"],
+        "equity_risk_score": outcomes["equity_risk_score"],
+        "equity_risk_class": equity_risk_class
+    }, copy=False)  # Arrays are freshly built here, so adopt them without copying
     logger.info(f"Generated {len(training_df)} synthetic training scenarios")
     
     return training_df
@@ -203,7 +269,7 @@ def main(
         return
     
     logger.info(f"Loading master colleges from {master_colleges_path}...")
-    master_df = pd.read_csv(master_colleges_path)
+    master_df = load_master(master_colleges_path)
     logger.info(f"Loaded {len(master_df)} colleges")
     
     # Generate synthetic scenarios
@@ -216,6 +282,13 @@ def main(
     training_df.to_csv(output_path, index=False)
     logger.info(f"Training data saved to {output_path}")
     
+    # Uncompressed Feather copy (written after the CSV, so never older than it)
+    # that model training loads without CSV parsing
+    if PYARROW_AVAILABLE:
+        feather_path = output_path_obj.with_suffix(".feather")
+        training_df.to_feather(feather_path, compression="uncompressed")
+        logger.info(f"Training data Feather copy saved to {feather_path}")
+    
     # Print summary statistics
     logger.info("\nTraining Data Summary:")
     logger.info(f"Total scenarios: {len(training_df)}")
@@ -7,18 +7,106 @@ Purpose: Read, aggregate, clean, and validate multiple CSV sources
 import pandas as pd
 import numpy as np
 import os
+import re
 from pathlib import Path
 from typing import List, Dict, Optional, Union
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.io import fresh_sibling
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# pyarrow is optional; CSV reading and writing fall back to pandas without it
+try:
+    import pyarrow
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Column-name patterns for percentage columns and columns that must be numeric
+_PCT_RE = re.compile(r"pct|rate|percent")
+_NUMERIC_KW_RE = re.compile(r"enrollment|tuition|price|cost|wage|subsidy|gap")
+
+# Characters replaced by "_" when normalizing column names
+_COLUMN_NAME_TABLE = str.maketrans({" ": "_", "-": "_"})
+
+
+def _read_csv(path: Union[str, Path], usecols: Optional[List[str]] = None) -> pd.DataFrame:
+    """Parse a CSV (optionally only usecols) with the multithreaded pyarrow parser when installed, else the C parser."""
+    if not PYARROW_AVAILABLE:
+        return pd.read_csv(path, usecols=usecols, low_memory=False)
+    df = pd.read_csv(path, engine="pyarrow", usecols=usecols)
+    # The pyarrow parser keeps repeated header names; match the C parser's naming
+    if df.columns.duplicated().any():
+        df.columns = dedupe_column_names(list(df.columns))
+    return df
+
+
+def _load_dataset(
+    dataset_name: str,
+    filepath: Path,
+    merge_key: Optional[str],
+    usecols: Optional[List[str]] = None
+) -> Optional[pd.DataFrame]:
+    """
+    Read one source CSV and rename its ID column to institution_id.
+    
+    Args:
+        dataset_name: Name of the dataset (for logging)
+        filepath: Path to the CSV file
+        merge_key: Name of the dataset's ID column, if known
+        usecols: Optional raw header names to parse
+    
+    Returns:
+        Loaded DataFrame, or None if the file could not be read
+    """
+    try:
+        df = _read_csv(filepath, usecols=usecols)
+        if merge_key and merge_key in df.columns:
+            # Standardize merge key name
+            df = df.rename(columns={merge_key: "institution_id"})
+        elif "institution_id" not in df.columns:
+            logger.warning(f"No merge key found in {dataset_name}. Attempting to infer...")
+            # Try common ID column names (case-insensitive)
+            df_cols_lower = {col.lower(): col for col in df.columns}
+            # First try exact patterns
+            for col_pattern in ["id", "unitid", "unit id", "opeid", "college_id"]:
+                if col_pattern in df.columns:
+                    df = df.rename(columns={col_pattern: "institution_id"})
+                    logger.info(f"Found merge key: {col_pattern} -> institution_id")
+                    break
+                # Check case-insensitive match
+                elif col_pattern.lower() in df_cols_lower:
+                    original_col = df_cols_lower[col_pattern.lower()]
+                    df = df.rename(columns={original_col: "institution_id"})
+                    logger.info(f"Found merge key: {original_col} -> institution_id")
+                    break
+            else:
+                # If no exact match, try partial matches (for long column names)
+                for col in df.columns:
+                    col_lower = col.lower()
+                    if any(pattern in col_lower for pattern in ["unique", "identification", "unit"]):
+                        if "number" in col_lower or "id" in col_lower:
+                            df = df.rename(columns={col: "institution_id"})
+                            logger.info(f"Found merge key (partial match): {col} -> institution_id")
+                            break
+        
+        logger.info(f"Loaded {dataset_name}: {len(df)} rows, {len(df.columns)} columns")
+        return df
+    except Exception as e:
+        logger.error(f"Error loading {filepath}: {e}")
+        return None
+
 
 def read_and_merge_csvs(
     csv_paths: Dict[str, str],
     merge_keys: Dict[str, str],
-    data_dir: str = "data/raw"
+    data_dir: str = "data/raw",
+    usecols: Optional[Dict[str, List[str]]] = None
 ) -> pd.DataFrame:
     """
     Load multiple CSVs and merge on institution ID.
@@ -29,76 +117,56 @@ def read_and_merge_csvs(
         merge_keys: Dict mapping dataset names to merge key column names
                    e.g., {"affordability": "institution_id", "results": "institution_id"}
         data_dir: Directory containing raw CSV files
+        usecols: Optional dict mapping dataset names to the raw header names to
+                 parse (include the ID column); other columns are skipped by the
+                 parser. Datasets not listed are read in full.
     
     Returns:
         Merged DataFrame with all features
     """
     data_dir_path = Path(data_dir)
-    dfs = {}
+    usecols = usecols or {}
     
+    datasets = []
     for dataset_name, filename in csv_paths.items():
         filepath = data_dir_path / filename
         if not filepath.exists():
             logger.warning(f"File not found: {filepath}. Skipping {dataset_name} dataset.")
             continue
-        
-        try:
-            df = pd.read_csv(filepath)
-            merge_key = merge_keys.get(dataset_name)
-            if merge_key and merge_key in df.columns:
-                # Standardize merge key name
-                df = df.rename(columns={merge_key: "institution_id"})
-            elif "institution_id" not in df.columns:
-                logger.warning(f"No merge key found in {dataset_name}. Attempting to infer...")
-                # Try common ID column names (case-insensitive)
-                df_cols_lower = {col.lower(): col for col in df.columns}
-                # First try exact patterns
-                for col_pattern in ["id", "unitid", "unit id", "opeid", "college_id"]:
-                    if col_pattern in df.columns:
-                        df = df.rename(columns={col_pattern: "institution_id"})
-                        logger.info(f"Found merge key: {col_pattern} -> institution_id")
-                        break
-                    # Check case-insensitive match
-                    elif col_pattern.lower() in df_cols_lower:
-                        original_col = df_cols_lower[col_pattern.lower()]
-                        df = df.rename(columns={original_col: "institution_id"})
-                        logger.info(f"Found merge key: {original_col} -> institution_id")
-                        break
-                else:
-                    # If no exact match, try partial matches (for long column names)
-                    for col in df.columns:
-                        col_lower = col.lower()
-                        if any(pattern in col_lower for pattern in ["unique", "identification", "unit"]):
-                            if "number" in col_lower or "id" in col_lower:
-                                df = df.rename(columns={col: "institution_id"})
-                                logger.info(f"Found merge key (partial match): {col} -> institution_id")
-                                break
+        datasets.append((dataset_name, filepath))
+    
+    # Parse the files concurrently (the parsers release the GIL); map yields the
+    # frames in csv_paths order, so merge order and column suffixes are unchanged
+    merged_df = None
+    max_workers = max(1, min(len(datasets), os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = executor.map(
+            lambda item: _load_dataset(
+                item[0], item[1], merge_keys.get(item[0]), usecols.get(item[0])
+            ),
+            datasets
+        )
+        for (dataset_name, _), df in zip(datasets, frames):
+            if df is None:
+                continue
             
-            dfs[dataset_name] = df
-            logger.info(f"Loaded {dataset_name}: {len(df)} rows, {len(df.columns)} columns")
-        except Exception as e:
-            logger.error(f"Error loading {filepath}: {e}")
-            continue
-    
-    if not dfs:
+            # Merge in order as each parsed frame becomes available
+            if merged_df is None:
+                merged_df = df
+            elif "institution_id" in df.columns and "institution_id" in merged_df.columns:
+                merged_df = merged_df.merge(
+                    df,
+                    on="institution_id",
+                    how="outer",
+                    suffixes=("", f"_{dataset_name}")
+                )
+                logger.info(f"Merged {dataset_name}: {len(merged_df)} rows after merge")
+            else:
+                logger.warning(f"Cannot merge {dataset_name}: missing institution_id")
+    
+    if merged_df is None:
         raise ValueError("No CSV files were successfully loaded.")
     
-    # Start with the first dataset
-    merged_df = dfs[list(dfs.keys())[0]].copy()
-    
-    # Merge remaining datasets
-    for dataset_name, df in list(dfs.items())[1:]:
-        if "institution_id" in df.columns and "institution_id" in merged_df.columns:
-            merged_df = merged_df.merge(
-                df,
-                on="institution_id",
-                how="outer",
-                suffixes=("", f"_{dataset_name}")
-            )
-            logger.info(f"Merged {dataset_name}: {len(merged_df)} rows after merge")
-        else:
-            logger.warning(f"Cannot merge {dataset_name}: missing institution_id")
-    
     return merged_df
 
 
@@ -113,10 +181,11 @@ def clean_data(df: pd.DataFrame, config: Optional[Dict] = None) -> pd.DataFrame:
     Returns:
         Cleaned DataFrame
     """
-    df = df.copy()
+    # Shallow: names are reassigned on the copy and drop_duplicates materializes new data
+    df = df.copy(deep=False)
     
     # Normalize column names: lowercase, replace spaces with underscores
-    df.columns = df.columns.str.lower().str.replace(" ", "_").str.replace("-", "_")
+    df.columns = [col.lower().translate(_COLUMN_NAME_TABLE) for col in df.columns]
     
     # Remove duplicate rows
     initial_rows = len(df)
@@ -128,34 +197,29 @@ def clean_data(df: pd.DataFrame, config: Optional[Dict] = None) -> pd.DataFrame:
     numeric_cols = df.select_dtypes(include=[np.number]).columns
     categorical_cols = df.select_dtypes(include=["object", "category"]).columns
     
+    # Only columns that actually have gaps need filling. Names repeated after
+    # normalization can't be addressed by label, so those are left as they are.
+    repeated = df.columns.duplicated(keep=False)
+    for col in df.columns[repeated].unique():
+        logger.warning(f"Skipping problematic column: {col}")
+    fillable = df.columns[df.isna().any().to_numpy() & ~repeated]
+    numeric_cols = numeric_cols[numeric_cols.isin(fillable)]
+    categorical_cols = categorical_cols[categorical_cols.isin(fillable)]
+    
     # Fill numeric columns with median (or 0 for counts/percentages)
-    for col in numeric_cols:
-        try:
-            missing_count = int(df[col].isna().sum())
-            if missing_count > 0:
-                if "pct" in col or "rate" in col or "percent" in col:
-                    df[col] = df[col].fillna(0)
-                else:
-                    median_val = df[col].median()
-                    if pd.notna(median_val):
-                        df[col] = df[col].fillna(median_val)
-                    else:
-                        df[col] = df[col].fillna(0)
-        except (ValueError, TypeError):
-            # Skip columns that cause issues
-            logger.warning(f"Skipping problematic column: {col}")
-            continue
+    is_pct = numeric_cols.str.contains(_PCT_RE)
+    pct_fill_cols = numeric_cols[is_pct]
+    median_fill_cols = numeric_cols[~is_pct]
+    if len(pct_fill_cols) > 0:
+        df[pct_fill_cols] = df[pct_fill_cols].fillna(0)
+    if len(median_fill_cols) > 0:
+        # All-missing columns have no median; fall back to 0
+        medians = df[median_fill_cols].median().fillna(0)
+        df[median_fill_cols] = df[median_fill_cols].fillna(medians)
     
     # Fill categorical columns with "Unknown"
-    for col in categorical_cols:
-        try:
-            missing_count = int(df[col].isna().sum())
-            if missing_count > 0:
-                df[col] = df[col].fillna("Unknown")
-        except (ValueError, TypeError):
-            # Skip columns that cause issues
-            logger.warning(f"Skipping problematic column: {col}")
-            continue
+    if len(categorical_cols) > 0:
+        df[categorical_cols] = df[categorical_cols].fillna("Unknown")
     
     # Fix data types
     # Ensure institution_id is string or int (not float)
@@ -163,17 +227,25 @@ def clean_data(df: pd.DataFrame, config: Optional[Dict] = None) -> pd.DataFrame:
         df["institution_id"] = pd.to_numeric(df["institution_id"], errors="coerce").astype("Int64")
     
     # Convert percentage columns to 0-100 range if they're in 0-1 range
-    pct_cols = [col for col in df.columns if "pct" in col or "rate" in col or "percent" in col]
-    for col in pct_cols:
-        if df[col].max() <= 1.0 and df[col].min() >= 0:
-            df[col] = df[col] * 100
-            logger.info(f"Converted {col} from 0-1 to 0-100 scale")
+    pct_cols = df.columns[df.columns.str.contains(_PCT_RE)]
+    if len(pct_cols) > 0:
+        # One min/max reduction over all percentage columns, then one bulk rescale
+        bounds = df[pct_cols].agg(["min", "max"])
+        in_unit_range = (bounds.loc["max"] <= 1.0) & (bounds.loc["min"] >= 0)
+        scale_cols = bounds.columns[in_unit_range.to_numpy()]
+        if len(scale_cols) > 0:
+            df[scale_cols] = df[scale_cols] * 100
+            for col in scale_cols:
+                logger.info(f"Converted {col} from 0-1 to 0-100 scale")
     
     # Ensure enrollment, tuition, etc. are numeric
-    numeric_keywords = ["enrollment", "tuition", "price", "cost", "wage", "subsidy", "gap"]
-    for col in df.columns:
-        if any(keyword in col for keyword in numeric_keywords):
-            df[col] = pd.to_numeric(df[col], errors="coerce")
+    for col in df.columns[df.columns.str.contains(_NUMERIC_KW_RE)]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    
+    # Low-cardinality group keys as categoricals, so groupby works on integer codes
+    for col in ("state", "institution_type"):
+        if col in df.columns:
+            df[col] = df[col].astype("category")
     
     logger.info(f"Data cleaning complete. Final shape: {df.shape}")
     return df
@@ -182,7 +254,8 @@ def clean_data(df: pd.DataFrame, config: Optional[Dict] = None) -> pd.DataFrame:
 def aggregate_metrics(
     df: pd.DataFrame,
     group_cols: Optional[List[str]] = None,
-    agg_functions: Optional[Dict[str, List[str]]] = None
+    agg_functions: Optional[Dict[str, List[str]]] = None,
+    numeric_cols: Optional[List[str]] = None
 ) -> pd.DataFrame:
     """
     Compute summary statistics per college, state, institution type.
@@ -191,6 +264,8 @@ def aggregate_metrics(
         df: Input DataFrame
         group_cols: Columns to group by (e.g., ["state", "institution_type"])
         agg_functions: Dict mapping column names to aggregation functions
+        numeric_cols: Numeric columns of df, if already known (used for the
+                      default aggregations)
     
     Returns:
         Aggregated DataFrame
@@ -205,31 +280,164 @@ def aggregate_metrics(
         logger.warning("No valid group columns found. Returning original DataFrame.")
         return df
     
-    if agg_functions is None:
-        # Default aggregations
-        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-        agg_functions = {
-            col: ["mean", "median", "std", "min", "max", "count"]
-            for col in numeric_cols
-            if col not in group_cols
-        }
+    grouped = df.groupby(group_cols, observed=True)
     
-    # Aggregate
-    aggregated = df.groupby(group_cols).agg(agg_functions).reset_index()
-    
-    # Flatten column names
-    aggregated.columns = ["_".join(col).strip() if col[1] else col[0] 
-                          for col in aggregated.columns.values]
+    if agg_functions is None:
+        # Default aggregations: run each reducer once over all value columns
+        # (one 2D groupby kernel per statistic) instead of per column
+        if numeric_cols is None:
+            numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+        value_cols = [col for col in dict.fromkeys(numeric_cols) if col not in group_cols]
+        stats = ["mean", "median", "std", "min", "max", "count"]
+        per_stat = [getattr(grouped[value_cols], stat)() for stat in stats]
+        n_cols = per_stat[0].shape[1]
+        
+        # Interleave back to col_mean, col_median, ... order
+        order = np.arange(len(stats) * n_cols).reshape(len(stats), n_cols).T.ravel()
+        aggregated = pd.concat(per_stat, axis=1).iloc[:, order].reset_index()
+        aggregated.columns = group_cols + [
+            f"{col}_{stat}" for col in per_stat[0].columns for stat in stats
+        ]
+    else:
+        aggregated = grouped.agg(agg_functions).reset_index()
+        
+        # Flatten column names
+        aggregated.columns = ["_".join(col).strip() if col[1] else col[0] 
+                              for col in aggregated.columns.values]
     
     logger.info(f"Aggregated data: {len(aggregated)} groups from {len(df)} rows")
     return aggregated
 
 
+def shrink_dtypes(df: pd.DataFrame, category_ratio: float = 0.5) -> pd.DataFrame:
+    """
+    Narrow column dtypes to cut memory use.
+    
+    Integer columns are downcast to the smallest integer type that holds them.
+    Float columns become float32 only when every value survives the round trip
+    exactly, so no precision is lost. Text columns with fewer distinct values
+    than category_ratio * rows become categoricals.
+    
+    Args:
+        df: Input DataFrame
+        category_ratio: Max distinct/rows ratio for converting text to category
+    
+    Returns:
+        DataFrame with narrowed dtypes (the input is not modified)
+    """
+    df = df.copy(deep=False)
+    
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_integer_dtype(series.dtype):
+            df[col] = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_float_dtype(series.dtype) and series.dtype != np.float32:
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            with np.errstate(over="ignore"):
+                narrowed = values.astype(np.float32)
+            if np.array_equal(narrowed, values, equal_nan=True):
+                df[col] = narrowed
+        elif (pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype)) \
+                and len(df) > 0 and series.nunique() / len(df) < category_ratio:
+            df[col] = series.astype("category")
+    
+    return df
+
+
+def dedupe_column_names(columns: List[str]) -> List[str]:
+    """Rename repeated column names to name.1, name.2, ... as the C parser does."""
+    seen = {}
+    deduped = []
+    for col in columns:
+        count = seen.get(col, 0)
+        seen[col] = count + 1
+        deduped.append(col if count == 0 else f"{col}.{count}")
+    return deduped
+
+
+def write_master(df: pd.DataFrame, output_path: str):
+    """
+    Save a master dataset as CSV plus a zstd Parquet copy next to it.
+    
+    The frame is converted to Arrow once and both files are written from that
+    table. Parquet needs unique column names, so repeated names get the C
+    parser's name.1 suffixes there; load_master returns the same columns from
+    either file. The Parquet copy keeps dtypes, so load_master skips CSV
+    parsing and type inference. It is written after the CSV so it is never
+    older than it.
+    
+    With pyarrow, the CSV comes from pyarrow.csv.write_csv, whose text
+    differs from DataFrame.to_csv (the fallback): booleans are true/false,
+    whole-number floats have no ".0" (1 rather than 1.0), floats are written
+    as plain decimals (0.00001 rather than 1e-05), timestamps carry
+    microseconds, and the header and every string value are quoted. Values
+    read back the same, except that all-whole-number float columns parse as
+    int64.
+    
+    Args:
+        df: Master DataFrame
+        output_path: Output CSV path (the Parquet file gets the same stem)
+    """
+    output_path_obj = Path(output_path)
+    output_path_obj.parent.mkdir(parents=True, exist_ok=True)
+    parquet_path = output_path_obj.with_suffix(".parquet")
+    
+    table = None
+    if PYARROW_AVAILABLE:
+        try:
+            table = pyarrow.Table.from_pandas(
+                df.set_axis(dedupe_column_names(list(df.columns)), axis=1),
+                preserve_index=False
+            )
+        except (ValueError, TypeError, NotImplementedError) as e:
+            # Mixed-type object columns have no Arrow type
+            logger.warning(f"Could not convert {output_path} to Arrow ({e}); writing CSV only")
+    
+    if table is None:
+        df.to_csv(output_path_obj, index=False)
+        # Stale copies must not shadow the new CSV
+        parquet_path.unlink(missing_ok=True)
+        return
+    
+    # The CSV header keeps the original (possibly repeated) names
+    pacsv.write_csv(table.rename_columns([str(col) for col in df.columns]), output_path_obj)
+    pq.write_table(table, parquet_path, compression="zstd")
+    logger.info(f"Parquet copy saved to {parquet_path}")
+
+
+def load_master(path: str) -> pd.DataFrame:
+    """
+    Load a master colleges dataset and narrow its dtypes.
+    
+    Reads the Parquet copy written by write_master when it is at least as new
+    as the CSV; otherwise parses the CSV with the pyarrow parser (when
+    installed).
+    
+    Args:
+        path: Path to the CSV file
+    
+    Returns:
+        DataFrame with dtypes narrowed by shrink_dtypes
+    """
+    parquet_path = fresh_sibling(path, ".parquet") if PYARROW_AVAILABLE else None
+    if parquet_path is not None:
+        df = pd.read_parquet(parquet_path)
+    else:
+        df = _read_csv(path)
+    
+    before_mb = df.memory_usage(deep=True).sum() / 1024**2
+    df = shrink_dtypes(df)
+    after_mb = df.memory_usage(deep=True).sum() / 1024**2
+    logger.info(f"Loaded {parquet_path or path}: {len(df)} rows, {before_mb:.1f} MB -> {after_mb:.1f} MB after dtype narrowing")
+    return df
+
+
 def build_master_colleges(
     csv_paths: Optional[Dict[str, str]] = None,
     merge_keys: Optional[Dict[str, str]] = None,
     output_path: str = "data/master_colleges.csv",
-    data_dir: str = "data/raw"
+    data_dir: str = "data/raw",
+    usecols: Optional[Dict[str, List[str]]] = None
 ) -> pd.DataFrame:
     """
     Main function to build master colleges dataset.
@@ -239,6 +447,7 @@ def build_master_colleges(
         merge_keys: Dict mapping dataset names to merge key column names
         output_path: Output path for master dataset
         data_dir: Directory containing raw CSV files
+        usecols: Optional dict mapping dataset names to the raw columns to read
     
     Returns:
         Master colleges DataFrame
@@ -258,16 +467,14 @@ def build_master_colleges(
     
     # Read and merge CSVs
     logger.info("Reading and merging CSV files...")
-    merged_df = read_and_merge_csvs(csv_paths, merge_keys, data_dir)
+    merged_df = read_and_merge_csvs(csv_paths, merge_keys, data_dir, usecols=usecols)
     
     # Clean data
     logger.info("Cleaning data...")
     cleaned_df = clean_data(merged_df)
     
     # Save master dataset
-    output_path_obj = Path(output_path)
-    output_path_obj.parent.mkdir(parents=True, exist_ok=True)
-    cleaned_df.to_csv(output_path, index=False)
+    write_master(cleaned_df, output_path)
     logger.info(f"Master colleges dataset saved to {output_path}")
     
     return cleaned_df
@@ -6,12 +6,88 @@ Purpose: Domain-specific metric calculations
 
 import pandas as pd
 import numpy as np
-from typing import Dict, Optional
+import re
+from typing import Dict, List, Optional
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Column-name patterns used to locate each score component
+_GAP_RE = re.compile(r"gap")
+_HOURS_RE = re.compile(r"hours.*cover|cover.*hours", re.IGNORECASE)
+_WAGE_RE = re.compile(r"wage", re.IGNORECASE)
+_COST_RE = re.compile(r"net_price|(?i:cost)")
+_LOW_INCOME_RE = re.compile(r"low_income|(?i:pell)")
+_MINORITY_RE = re.compile(r"minority")
+_GRAD_RATE_RE = re.compile(r"grad_rate|graduation_rate")
+_ENROLLMENT_RE = re.compile(r"enrollment", re.IGNORECASE)
+_FUNDING_RE = re.compile(r"funding.*dependency|dependency.*funding", re.IGNORECASE)
+_COUNT_RE = re.compile(r"enrollment|students", re.IGNORECASE)
+
+# Equity risk class code (Low, Medium, High) for 0-4 raised risk flags
+_RISK_CLASS_CODES = np.array([0, 0, 1, 2, 2], dtype=np.int8)
+
+
+def _first_column(df: pd.DataFrame, pattern: re.Pattern) -> Optional[str]:
+    """First column whose name matches pattern, or None."""
+    matches = df.columns[df.columns.str.contains(pattern)]
+    return matches[0] if len(matches) > 0 else None
+
+
+def _stack_components(components: List[pd.Series]) -> np.ndarray:
+    """Stack equal-length component Series into one C-contiguous (rows, k) float64 array."""
+    return np.column_stack([
+        component.to_numpy(dtype=np.float64, na_value=np.nan) for component in components
+    ])
+
+
+def _normalize_columns(raw: np.ndarray, invert: np.ndarray, fallback: np.ndarray) -> np.ndarray:
+    """
+    Scale every column of raw to 0-100 by its own max, in place.
+    
+    raw must be a scratch array (as returned by _stack_components); every step
+    writes back into it, so no per-step temporaries of the full matrix are made.
+    
+    Args:
+        raw: (rows, k) component values, overwritten with the scores
+        invert: Per-column flags; inverted columns score 100 at 0 and 0 at the max
+        fallback: Per-column score used when a column has no positive max
+    
+    Returns:
+        raw, holding the normalized components
+    """
+    maxes = np.fmax.reduce(raw, axis=0)  # NaN-skipping max, NaN for all-missing columns
+    positive = maxes > 0
+    raw /= np.where(positive, maxes, 1.0)
+    inverted = np.flatnonzero(invert & positive)
+    raw[:, inverted] = 1 - raw[:, inverted]
+    raw *= 100
+    raw[:, ~positive] = fallback[~positive]
+    return raw
+
+
+def _composite_score(matrix: np.ndarray) -> np.ndarray:
+    """
+    Clip(0, 100) of the row-wise mean of a (rows, k) component array.
+    
+    NaNs are skipped like DataFrame.mean(axis=1). matrix is used as scratch
+    space (its NaNs are zeroed in place).
+    
+    Args:
+        matrix: Component values, one column per component
+    
+    Returns:
+        Array of per-row scores (NaN where every component is missing)
+    """
+    missing = np.isnan(matrix)
+    counts = matrix.shape[1] - missing.sum(axis=1)
+    matrix[missing] = 0.0
+    scores = matrix.sum(axis=1)
+    with np.errstate(invalid="ignore"):
+        scores /= counts
+    return np.clip(scores, 0, 100, out=scores)
+
 
 def calculate_affordability_stress_score(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -25,50 +101,44 @@ def calculate_affordability_stress_score(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame with added 'affordability_stress_score' column
     """
-    df = df.copy()
+    df = df.copy(deep=False)  # Columns are only added, so the caller's frame stays untouched
     
-    # Normalize components (0-100 scale)
-    stress_components = []
+    # Raw components, normalized together (0-100 scale) once all are found
+    raw_components = []
+    invert = []
+    fallback = []
     
     # Component 1: Affordability gap (higher gap = more stress)
-    gap_cols = [col for col in df.columns if "affordability_gap" in col or "gap" in col]
-    if gap_cols:
-        gap_col = gap_cols[0]
-        if df[gap_col].max() > 0:
-            gap_normalized = (df[gap_col] / df[gap_col].max()) * 100
-        else:
-            gap_normalized = pd.Series(0, index=df.index)
-        stress_components.append(gap_normalized)
+    gap_col = _first_column(df, _GAP_RE)
+    if gap_col is not None:
+        raw_components.append(df[gap_col])
+        invert.append(False)
+        fallback.append(0)
     
     # Component 2: Hours to cover gap (more hours = more stress)
-    hours_cols = [col for col in df.columns if "hours" in col.lower() and "cover" in col.lower()]
-    if hours_cols:
-        hours_col = hours_cols[0]
-        if df[hours_col].max() > 0:
-            hours_normalized = (df[hours_col] / df[hours_col].max()) * 100
-        else:
-            hours_normalized = pd.Series(0, index=df.index)
-        stress_components.append(hours_normalized)
+    hours_col = _first_column(df, _HOURS_RE)
+    if hours_col is not None:
+        raw_components.append(df[hours_col])
+        invert.append(False)
+        fallback.append(0)
     
     # Component 3: Low wage relative to cost (lower wage/cost ratio = more stress)
-    wage_cols = [col for col in df.columns if "wage" in col.lower() or "min_wage" in col.lower()]
-    cost_cols = [col for col in df.columns if "net_price" in col or "cost" in col.lower()]
-    
-    if wage_cols and cost_cols:
-        wage_col = wage_cols[0]
-        cost_col = cost_cols[0]
-        wage_cost_ratio = df[wage_col] / (df[cost_col] + 1)  # +1 to avoid division by zero
-        if wage_cost_ratio.max() > 0:
-            # Invert: lower ratio = higher stress
-            wage_stress = (1 - (wage_cost_ratio / wage_cost_ratio.max())) * 100
-        else:
-            wage_stress = pd.Series(50, index=df.index)  # Neutral if no data
-        stress_components.append(wage_stress)
+    wage_col = _first_column(df, _WAGE_RE)
+    cost_col = _first_column(df, _COST_RE)
+    
+    if wage_col is not None and cost_col is not None:
+        raw_components.append(df[wage_col] / (df[cost_col] + 1))  # +1 to avoid division by zero
+        invert.append(True)  # Invert: lower ratio = higher stress
+        fallback.append(50)  # Neutral if no data
     
     # Combine components (weighted average)
-    if stress_components:
-        df["affordability_stress_score"] = pd.concat(stress_components, axis=1).mean(axis=1)
-        df["affordability_stress_score"] = df["affordability_stress_score"].clip(0, 100)
+    if raw_components:
+        stress_components = _normalize_columns(
+            _stack_components(raw_components),
+            np.array(invert),
+            np.array(fallback, dtype=np.float64)
+        )
+        df["affordability_stress_score"] = _composite_score(stress_components)
     else:
         df["affordability_stress_score"] = 0
         logger.warning("No affordability components found. Setting stress score to 0.")
@@ -86,29 +156,26 @@ def calculate_equity_risk_indicators(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame with added equity risk columns
     """
-    df = df.copy()
+    df = df.copy(deep=False)
     
     # Binary flags
     # High low-income percentage
-    low_income_cols = [col for col in df.columns if "low_income" in col or "pell" in col.lower()]
-    if low_income_cols:
-        low_income_col = low_income_cols[0]
+    low_income_col = _first_column(df, _LOW_INCOME_RE)
+    if low_income_col is not None:
         df["high_low_income"] = (df[low_income_col] > 50).astype(int)
     else:
         df["high_low_income"] = 0
     
     # High minority percentage
-    minority_cols = [col for col in df.columns if "minority" in col or "pct_minority" in col]
-    if minority_cols:
-        minority_col = minority_cols[0]
+    minority_col = _first_column(df, _MINORITY_RE)
+    if minority_col is not None:
         df["high_minority"] = (df[minority_col] > 50).astype(int)
     else:
         df["high_minority"] = 0
     
     # Low graduation rate
-    grad_rate_cols = [col for col in df.columns if "grad_rate" in col or "graduation_rate" in col]
-    if grad_rate_cols:
-        grad_rate_col = grad_rate_cols[0]
+    grad_rate_col = _first_column(df, _GRAD_RATE_RE)
+    if grad_rate_col is not None:
         df["low_grad_rate"] = (df[grad_rate_col] < 50).astype(int)
     else:
         df["low_grad_rate"] = 0
@@ -121,13 +188,15 @@ def calculate_equity_risk_indicators(df: pd.DataFrame) -> pd.DataFrame:
     
     # Composite equity risk score (0-100)
     risk_factors = ["high_low_income", "high_minority", "low_grad_rate", "high_stress"]
-    df["equity_risk_score"] = df[risk_factors].sum(axis=1) * 25  # Each factor = 25 points
-    
-    # Equity risk class
-    df["equity_risk_class"] = pd.cut(
-        df["equity_risk_score"],
-        bins=[-1, 33, 66, 100],
-        labels=["Low", "Medium", "High"]
+    flag_count = df[risk_factors].to_numpy().sum(axis=1)
+    df["equity_risk_score"] = flag_count * 25  # Each factor = 25 points
+    
+    # Equity risk class: scores 0-33 Low, 34-66 Medium, 67-100 High, looked up
+    # straight from the flag count since the score only takes five values
+    df["equity_risk_class"] = pd.Categorical.from_codes(
+        _RISK_CLASS_CODES[flag_count],
+        categories=["Low", "Medium", "High"],
+        ordered=True
     )
     
     return df
@@ -145,14 +214,13 @@ def calculate_institutional_resilience_score(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame with added 'resilience_score' column
     """
-    df = df.copy()
+    df = df.copy(deep=False)
     
     resilience_components = []
     
     # Component 1: Enrollment size (larger = more resilient)
-    enrollment_cols = [col for col in df.columns if "enrollment" in col.lower()]
-    if enrollment_cols:
-        enrollment_col = enrollment_cols[0]
+    enrollment_col = _first_column(df, _ENROLLMENT_RE)
+    if enrollment_col is not None:
         if df[enrollment_col].max() > 0:
             enrollment_normalized = (df[enrollment_col] / df[enrollment_col].max()) * 100
         else:
@@ -171,9 +239,8 @@ def calculate_institutional_resilience_score(df: pd.DataFrame) -> pd.DataFrame:
         resilience_components.append(type_resilience)
     
     # Component 3: Low funding dependency (if we have funding data)
-    funding_cols = [col for col in df.columns if "funding" in col.lower() and "dependency" in col.lower()]
-    if funding_cols:
-        funding_col = funding_cols[0]
+    funding_col = _first_column(df, _FUNDING_RE)
+    if funding_col is not None:
         # Lower dependency = higher resilience
         if df[funding_col].max() > 0:
             funding_resilience = (1 - (df[funding_col] / df[funding_col].max())) * 100
@@ -183,8 +250,7 @@ def calculate_institutional_resilience_score(df: pd.DataFrame) -> pd.DataFrame:
     
     # Combine components
     if resilience_components:
-        df["resilience_score"] = pd.concat(resilience_components, axis=1).mean(axis=1)
-        df["resilience_score"] = df["resilience_score"].clip(0, 100)
+        df["resilience_score"] = _composite_score(_stack_components(resilience_components))
     else:
         df["resilience_score"] = 50  # Neutral if no data
         logger.warning("No resilience components found. Setting resilience score to 50.")
@@ -192,12 +258,16 @@ def calculate_institutional_resilience_score(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def calculate_state_level_aggregations(df: pd.DataFrame) -> pd.DataFrame:
+def calculate_state_level_aggregations(
+    df: pd.DataFrame,
+    numeric_cols: Optional[List[str]] = None
+) -> pd.DataFrame:
     """
     Calculate state-level aggregations (average impacts, total students affected).
     
     Args:
         df: Input DataFrame with college-level data
+        numeric_cols: Numeric columns of df, if already known
     
     Returns:
         DataFrame with state-level aggregations
@@ -206,20 +276,22 @@ def calculate_state_level_aggregations(df: pd.DataFrame) -> pd.DataFrame:
         logger.warning("No 'state' column found. Cannot aggregate by state.")
         return pd.DataFrame()
     
-    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-    numeric_cols = [col for col in numeric_cols if col != "institution_id"]
+    if numeric_cols is None:
+        numeric_cols = df.select_dtypes(include=[np.number]).columns
+    numeric_cols = pd.Index(numeric_cols)
+    numeric_cols = numeric_cols[numeric_cols != "institution_id"]
     
-    agg_dict = {}
-    for col in numeric_cols:
-        if "enrollment" in col.lower() or "students" in col.lower():
-            agg_dict[col] = "sum"  # Sum for counts
-        else:
-            agg_dict[col] = "mean"  # Average for rates/percentages
+    # Sum for counts, average for rates/percentages
+    is_count = numeric_cols.str.contains(_COUNT_RE)
+    agg_dict = {col: "sum" if count else "mean" for col, count in zip(numeric_cols, is_count)}
     
-    state_agg = df.groupby("state").agg(agg_dict).reset_index()
+    # One grouper serves both the aggregation and the counts, so the state
+    # keys are factorized only once
+    grouped = df.groupby("state", observed=True)
+    state_agg = grouped.agg(agg_dict).reset_index()
     
     # Add count of institutions per state
-    state_agg["institution_count"] = df.groupby("state").size().values
+    state_agg["institution_count"] = grouped.size().values
     
     return state_agg
 
@@ -236,6 +308,10 @@ def enhance_master_colleges(df: pd.DataFrame) -> pd.DataFrame:
     """
     logger.info("Calculating custom metrics...")
     
+    # One consolidating copy up front; each metric below then only appends
+    # columns to it (a fragmented frame would warn on every insert)
+    df = df.copy()
+    
     # Calculate all custom metrics
     df = calculate_affordability_stress_score(df)
     df = calculate_equity_risk_indicators(df)
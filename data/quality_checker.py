@@ -6,14 +6,26 @@ Purpose: Comprehensive data validation and reporting
 
 import pandas as pd
 import numpy as np
-import json
+import re
+import sys
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 import logging
 
+# Add project root to path so we can import utils (this file is also run as a script)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.io import write_json
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Column-name patterns for the range checks
+_PCT_RE = re.compile(r"pct|rate|percent")
+_ENROLLMENT_RE = re.compile(r"enrollment")
+_MONEY_RE = re.compile(r"tuition|price|cost")
+_GRAD_RATE_RE = re.compile(r"grad_rate|graduation_rate")
+
 
 def missing_value_analysis(df: pd.DataFrame) -> Dict[str, Any]:
     """
@@ -25,34 +37,20 @@ def missing_value_analysis(df: pd.DataFrame) -> Dict[str, Any]:
     Returns:
         Dict with missing value statistics
     """
-    missing_stats = {}
     total_rows = len(df)
     
-    for col in df.columns:
-        try:
-            col_data = df[col]
-            # Handle case where col might be a DataFrame (duplicate column names)
-            if isinstance(col_data, pd.DataFrame):
-                col_data = col_data.iloc[:, 0]  # Take first column if duplicate
-            missing_count = col_data.isna().sum()
-            # Ensure it's a scalar
-            if isinstance(missing_count, pd.Series):
-                missing_count = missing_count.iloc[0] if len(missing_count) > 0 else 0
-            missing_count = int(missing_count) if pd.notna(missing_count) else 0
-            missing_pct = (missing_count / total_rows) * 100 if total_rows > 0 else 0
-            
-            missing_stats[col] = {
-                "missing_count": missing_count,
-                "missing_percentage": round(missing_pct, 2),
-                "non_missing_count": int(total_rows - missing_count)
-            }
-        except Exception as e:
-            logger.warning(f"Error analyzing column {col}: {e}")
-            missing_stats[col] = {
-                "missing_count": 0,
-                "missing_percentage": 0.0,
-                "non_missing_count": total_rows
-            }
+    # One isna pass over the frame; a repeated column name reports its first column
+    first_cols = df.loc[:, ~df.columns.duplicated()]
+    missing_counts = first_cols.isna().sum().to_numpy()
+    
+    missing_stats = {}
+    for col, missing_count in zip(first_cols.columns, missing_counts.tolist()):
+        missing_pct = (missing_count / total_rows) * 100 if total_rows > 0 else 0
+        missing_stats[col] = {
+            "missing_count": missing_count,
+            "missing_percentage": round(missing_pct, 2),
+            "non_missing_count": total_rows - missing_count
+        }
     
     # Summary
     cols_with_missing = [col for col, stats in missing_stats.items() 
@@ -67,67 +65,68 @@ def missing_value_analysis(df: pd.DataFrame) -> Dict[str, Any]:
     }
 
 
-def outlier_detection(df: pd.DataFrame, method: str = "iqr") -> Dict[str, Any]:
+def outlier_detection(
+    df: pd.DataFrame,
+    method: str = "iqr",
+    numeric_cols: Optional[List[str]] = None
+) -> Dict[str, Any]:
     """
     Detect outliers using IQR method or z-scores.
     
     Args:
         df: Input DataFrame
         method: "iqr" or "zscore"
+        numeric_cols: Numeric columns of df, if already known
     
     Returns:
         Dict with outlier statistics
     """
-    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    if numeric_cols is None:
+        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
     outlier_stats = {}
     
-    for col in numeric_cols:
-        try:
-            col_data = df[col]
-            # Handle duplicate column names
-            if isinstance(col_data, pd.DataFrame):
-                col_data = col_data.iloc[:, 0]
-            
-            if col_data.isna().all():
-                continue
-            
-            values = col_data.dropna()
-            if len(values) == 0:
-                continue
-        except Exception as e:
-            logger.warning(f"Error processing column {col} for outliers: {e}")
-            continue
-        
-        if method == "iqr":
-            Q1 = values.quantile(0.25)
-            Q3 = values.quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            
-            col_data = df[col] if not isinstance(df[col], pd.DataFrame) else df[col].iloc[:, 0]
-            outliers = df[(col_data < lower_bound) | (col_data > upper_bound)]
-            outlier_count = len(outliers)
-            
-        elif method == "zscore":
-            z_scores = np.abs((values - values.mean()) / values.std())
-            outlier_mask = z_scores > 3
-            outlier_count = outlier_mask.sum()
-            outliers = df.loc[values.index[outlier_mask]]
-        else:
-            continue
-        
-        if outlier_count > 0:
-            outlier_stats[col] = {
-                "outlier_count": int(outlier_count),
-                "outlier_percentage": round((outlier_count / len(df)) * 100, 2),
-                "lower_bound": float(lower_bound) if method == "iqr" else None,
-                "upper_bound": float(upper_bound) if method == "iqr" else None,
-                "min_value": float(values.min()),
-                "max_value": float(values.max()),
-                "mean": float(values.mean()),
-                "median": float(values.median())
-            }
+    # Stack every numeric column into one (rows, cols) matrix; a repeated name
+    # resolves to its first column. All-missing columns are skipped.
+    first_cols = df.loc[:, ~df.columns.duplicated()]
+    cols = list(dict.fromkeys(numeric_cols))
+    arr = first_cols[cols].to_numpy(dtype=np.float64, na_value=np.nan)
+    has_values = ~np.isnan(arr).all(axis=0)
+    cols = [col for col, keep in zip(cols, has_values) if keep]
+    arr = arr[:, has_values]
+    
+    if method == "iqr":
+        Q1, Q3 = np.nanquantile(arr, [0.25, 0.75], axis=0)
+        IQR = Q3 - Q1
+        lower_bound = Q1 - 1.5 * IQR
+        upper_bound = Q3 + 1.5 * IQR
+        outlier_counts = ((arr < lower_bound) | (arr > upper_bound)).sum(axis=0)
+    elif method == "zscore":
+        with np.errstate(invalid="ignore", divide="ignore"):
+            z_scores = np.abs((arr - np.nanmean(arr, axis=0)) / np.nanstd(arr, axis=0, ddof=1))
+        outlier_counts = (z_scores > 3).sum(axis=0)
+    else:
+        outlier_counts = np.zeros(len(cols), dtype=np.int64)
+    
+    flagged = np.flatnonzero(outlier_counts > 0)
+    if len(flagged) > 0:
+        flagged_values = arr[:, flagged]
+        mins = np.nanmin(flagged_values, axis=0)
+        maxes = np.nanmax(flagged_values, axis=0)
+        means = np.nanmean(flagged_values, axis=0)
+        medians = np.nanmedian(flagged_values, axis=0)
+    
+    for i, j in enumerate(flagged):
+        outlier_count = int(outlier_counts[j])
+        outlier_stats[cols[j]] = {
+            "outlier_count": outlier_count,
+            "outlier_percentage": round((outlier_count / len(df)) * 100, 2),
+            "lower_bound": float(lower_bound[j]) if method == "iqr" else None,
+            "upper_bound": float(upper_bound[j]) if method == "iqr" else None,
+            "min_value": float(mins[i]),
+            "max_value": float(maxes[i]),
+            "mean": float(means[i]),
+            "median": float(medians[i])
+        }
     
     return {
         "method": method,
@@ -148,33 +147,43 @@ def duplicate_detection(df: pd.DataFrame, key_columns: Optional[List[str]] = Non
     Returns:
         Dict with duplicate statistics
     """
+    # Hash the rows once and reuse the count
+    duplicate_rows = int(df.duplicated().sum())
     results = {
-        "duplicate_rows": int(df.duplicated().sum()),
-        "duplicate_percentage": round((df.duplicated().sum() / len(df)) * 100, 2) if len(df) > 0 else 0
+        "duplicate_rows": duplicate_rows,
+        "duplicate_percentage": round((duplicate_rows / len(df)) * 100, 2) if len(df) > 0 else 0
     }
     
     if key_columns:
         key_duplicates = {}
         for col in key_columns:
             if col in df.columns:
-                dup_count = df[col].duplicated().sum()
+                # One hash pass: the distinct values (missing counted once) give
+                # both the duplicate count and the non-missing unique count
+                distinct = df[col].drop_duplicates()
+                dup_count = len(df) - len(distinct)
                 key_duplicates[col] = {
-                    "duplicate_count": int(dup_count),
+                    "duplicate_count": dup_count,
                     "duplicate_percentage": round((dup_count / len(df)) * 100, 2) if len(df) > 0 else 0,
-                    "unique_count": int(df[col].nunique())
+                    "unique_count": int(distinct.notna().sum())
                 }
         results["key_column_duplicates"] = key_duplicates
     
     return results
 
 
-def data_type_validation(df: pd.DataFrame, expected_types: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+def data_type_validation(
+    df: pd.DataFrame,
+    expected_types: Optional[Dict[str, str]] = None,
+    numeric_cols: Optional[List[str]] = None
+) -> Dict[str, Any]:
     """
     Validate data types and ranges.
     
     Args:
         df: Input DataFrame
         expected_types: Dict mapping column names to expected types
+        numeric_cols: Numeric columns of df, if already known
     
     Returns:
         Dict with validation results
@@ -182,24 +191,37 @@ def data_type_validation(df: pd.DataFrame, expected_types: Optional[Dict[str, st
     validation_results = {}
     
     # Check numeric ranges
-    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-    for col in numeric_cols:
+    if numeric_cols is None:
+        numeric_cols = df.select_dtypes(include=[np.number]).columns
+    numeric_cols = pd.Index(numeric_cols)
+    is_pct = numeric_cols.str.contains(_PCT_RE)
+    is_enrollment = numeric_cols.str.contains(_ENROLLMENT_RE)
+    is_money = numeric_cols.str.contains(_MONEY_RE)
+    
+    # Range stats for every checked column in one pass each, so the loop below
+    # only looks up scalars
+    checked = df[numeric_cols[is_pct | is_enrollment | is_money].unique()]
+    col_min = checked.min()
+    col_max = checked.max()
+    negative_counts = (checked < 0).sum()
+    
+    for col, pct, enrollment, money in zip(numeric_cols, is_pct, is_enrollment, is_money):
         issues = []
         
         # Check for percentage columns (should be 0-100)
-        if "pct" in col or "rate" in col or "percent" in col:
-            if df[col].min() < 0 or df[col].max() > 100:
-                issues.append(f"Percentage out of range: min={df[col].min()}, max={df[col].max()}")
+        if pct:
+            if col_min[col] < 0 or col_max[col] > 100:
+                issues.append(f"Percentage out of range: min={col_min[col]}, max={col_max[col]}")
         
         # Check for enrollment (should be positive)
-        if "enrollment" in col:
-            if (df[col] < 0).any():
-                issues.append(f"Negative enrollment values found: {((df[col] < 0).sum())} rows")
+        if enrollment:
+            if negative_counts[col] > 0:
+                issues.append(f"Negative enrollment values found: {negative_counts[col]} rows")
         
         # Check for tuition/price (should be non-negative)
-        if any(keyword in col for keyword in ["tuition", "price", "cost"]):
-            if (df[col] < 0).any():
-                issues.append(f"Negative values found: {((df[col] < 0).sum())} rows")
+        if money:
+            if negative_counts[col] > 0:
+                issues.append(f"Negative values found: {negative_counts[col]} rows")
         
         if issues:
             validation_results[col] = {
@@ -255,9 +277,11 @@ def cross_column_consistency(df: pd.DataFrame) -> Dict[str, Any]:
             })
     
     # Check: grad_rate should be 0-100
-    grad_rate_cols = [col for col in df.columns if "grad_rate" in col or "graduation_rate" in col]
+    grad_rate_cols = df.columns[df.columns.str.contains(_GRAD_RATE_RE)]
+    grad_rates = df[grad_rate_cols.unique()]
+    out_of_range_counts = ((grad_rates < 0) | (grad_rates > 100)).sum()
     for col in grad_rate_cols:
-        out_of_range = ((df[col] < 0) | (df[col] > 100)).sum()
+        out_of_range = out_of_range_counts[col]
         if out_of_range > 0:
             consistency_issues.append({
                 "check": f"{col}_range",
@@ -295,6 +319,9 @@ def quality_checks(df: pd.DataFrame, output_path: Optional[str] = None) -> Dict[
     """
     logger.info("Running data quality checks...")
     
+    # Resolve the numeric columns once for every check that needs them
+    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    
     report = {
         "dataset_info": {
             "shape": list(df.shape),
@@ -302,9 +329,9 @@ def quality_checks(df: pd.DataFrame, output_path: Optional[str] = None) -> Dict[
             "memory_usage_mb": round(df.memory_usage(deep=True).sum() / 1024**2, 2)
         },
         "missing_values": missing_value_analysis(df),
-        "outliers": outlier_detection(df, method="iqr"),
+        "outliers": outlier_detection(df, method="iqr", numeric_cols=numeric_cols),
         "duplicates": duplicate_detection(df, key_columns=["institution_id"] if "institution_id" in df.columns else None),
-        "data_types": data_type_validation(df),
+        "data_types": data_type_validation(df, numeric_cols=numeric_cols),
         "consistency": cross_column_consistency(df)
     }
     
@@ -325,8 +352,7 @@ def quality_checks(df: pd.DataFrame, output_path: Optional[str] = None) -> Dict[
     if output_path:
         output_path_obj = Path(output_path)
         output_path_obj.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, "w") as f:
-            json.dump(report, f, indent=2, default=str)
+        write_json(report, output_path)
         logger.info(f"Quality report saved to {output_path}")
     
     logger.info(f"Quality checks complete. Overall score: {report['overall_quality_score']}/100")
@@ -335,7 +361,6 @@ def quality_checks(df: pd.DataFrame, output_path: Optional[str] = None) -> Dict[
 
 if __name__ == "__main__":
     # Example usage
-    import sys
     if len(sys.argv) > 1:
         csv_path = sys.argv[1]
         df = pd.read_csv(csv_path)
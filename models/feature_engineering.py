@@ -10,13 +10,132 @@ from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.model_selection import train_test_split
 import joblib
 from pathlib import Path
-from typing import Tuple, Dict, Optional
+from typing import Tuple, Dict, List, Optional
 import logging
+import weakref
+from collections import OrderedDict
 from models.model_config import FEATURE_CONFIG
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Recent prepare_features(cache=True) results, least recently used first
+_PREPARED_CACHE_SIZE = 4
+_PREPARED_CACHE: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+# Comparison operators usable in binary flag conditions
+_COMPARISON_OPS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal
+}
+
+
+def _interaction_block(df: pd.DataFrame, interaction_pairs: list) -> Tuple[List[str], np.ndarray]:
+    """Names and (rows, k) float64 products of the interaction pairs present in df."""
+    pairs = []
+    for col1, col2 in interaction_pairs:
+        if col1 in df.columns and col2 in df.columns:
+            pairs.append((col1, col2))
+        else:
+            logger.warning(f"Cannot create interaction {col1}_x_{col2}: missing columns")
+    
+    interaction_names = [f"{col1}_x_{col2}" for col1, col2 in pairs]
+    if not pairs:
+        return interaction_names, np.empty((len(df), 0))
+    
+    # All products in one multiply over the stacked left/right operands; the
+    # result is a fresh array because to_numpy may return a read-only view
+    left = df[[col1 for col1, _ in pairs]].to_numpy(dtype=np.float64, na_value=np.nan)
+    right = df[[col2 for _, col2 in pairs]].to_numpy(dtype=np.float64, na_value=np.nan)
+    return interaction_names, left * right
+
+
+def _flag_block(df: pd.DataFrame, flag_configs: Dict) -> Tuple[List[str], np.ndarray]:
+    """Names and (rows, k) uint8 values of the configured binary flags."""
+    flag_names = list(flag_configs)
+    flags = np.zeros((len(df), len(flag_names)), dtype=np.uint8)
+    columns = {}  # Each referenced column is converted to an array only once
+    
+    for i, flag_name in enumerate(flag_names):
+        config = flag_configs[flag_name]
+        try:
+            if "conditions" in config:
+                mask = np.ones(len(df), dtype=bool)
+                for col, op, threshold, default in config["conditions"]:
+                    compare = _COMPARISON_OPS[op]
+                    if col in df.columns:
+                        if col not in columns:
+                            columns[col] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                        mask &= compare(columns[col], threshold)
+                    elif not compare(default, threshold):
+                        mask[:] = False
+                flags[:, i] = mask
+            else:
+                flags[:, i] = config["condition"](df).astype(int)
+            logger.debug(f"Created binary flag: {flag_name}")
+        except Exception as e:
+            logger.warning(f"Error creating flag {flag_name}: {e}")
+    
+    return flag_names, flags
+
+
+def _encode_column(
+    values: pd.Series,
+    encoder: LabelEncoder,
+    fit: bool
+) -> Tuple[np.ndarray, pd.Series]:
+    """
+    Label codes of one categorical column.
+    
+    Args:
+        values: Column values
+        encoder: LabelEncoder, whose classes_ are set when fitting
+        fit: Whether to fit the encoder on values
+    
+    Returns:
+        Tuple of (int64 codes, values with missing and unseen labels as "Unknown")
+    """
+    # Categorical input (from clean_data/shrink_dtypes) is encoded from its
+    # values, so unused or unsorted categories do not leak into classes_
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype(values.cat.categories.dtype)
+    
+    # Handle missing values
+    values = values.fillna("Unknown")
+    
+    if fit:
+        # One hash-based factorization gives both the sorted classes and the codes
+        categorical = pd.Categorical(values)
+        encoder.classes_ = np.asarray(categorical.categories, dtype=object)
+        return categorical.codes.astype(np.int64), values
+    
+    # Look labels up in the fitted classes; unseen labels map to "Unknown"
+    classes = pd.Index(encoder.classes_)
+    codes = classes.get_indexer(values)
+    unseen = codes < 0
+    if unseen.any():
+        if "Unknown" not in classes:
+            raise ValueError(f"{values.name} contains previously unseen labels and no 'Unknown' class")
+        codes[unseen] = classes.get_loc("Unknown")
+        values = values.where(~unseen, "Unknown")
+    return codes, values
+
+
+def _append_block(df: pd.DataFrame, names: List[str], block: np.ndarray) -> pd.DataFrame:
+    """
+    New frame with block's columns appended to df (replacing same-named columns).
+    
+    One concat of a single-block frame instead of one insert per column, which
+    would re-grow the column index and block list each time.
+    """
+    existing = df.columns.intersection(names)
+    if len(existing) > 0:
+        df = df.drop(columns=existing)
+    return pd.concat([df, pd.DataFrame(block, columns=names, index=df.index)], axis=1)
+
 
 def create_interaction_features(df: pd.DataFrame, interaction_pairs: list) -> pd.DataFrame:
     """
@@ -29,17 +148,12 @@ def create_interaction_features(df: pd.DataFrame, interaction_pairs: list) -> pd
     Returns:
         DataFrame with interaction features added
     """
-    df = df.copy()
+    interaction_names, products = _interaction_block(df, interaction_pairs)
+    if not interaction_names:
+        return df.copy(deep=False)
     
-    for col1, col2 in interaction_pairs:
-        if col1 in df.columns and col2 in df.columns:
-            interaction_name = f"{col1}_x_{col2}"
-            df[interaction_name] = df[col1] * df[col2]
-            logger.debug(f"Created interaction: {interaction_name}")
-        else:
-            logger.warning(f"Cannot create interaction {col1}_x_{col2}: missing columns")
-    
-    return df
+    logger.debug(f"Created interactions: {interaction_names}")
+    return _append_block(df, interaction_names, products)
 
 
 def create_binary_flags(df: pd.DataFrame, flag_configs: Dict) -> pd.DataFrame:
@@ -48,23 +162,14 @@ def create_binary_flags(df: pd.DataFrame, flag_configs: Dict) -> pd.DataFrame:
     
     Args:
         df: Input DataFrame
-        flag_configs: Dict mapping flag names to condition functions
+        flag_configs: Dict mapping flag names to {"conditions": [(column, op, threshold, default), ...]}
+                      (all conditions must hold), or to a legacy {"condition": func(df)} entry
     
     Returns:
-        DataFrame with binary flags added
+        DataFrame with binary flags added (uint8)
     """
-    df = df.copy()
-    
-    for flag_name, config in flag_configs.items():
-        condition_func = config["condition"]
-        try:
-            df[flag_name] = condition_func(df).astype(int)
-            logger.debug(f"Created binary flag: {flag_name}")
-        except Exception as e:
-            logger.warning(f"Error creating flag {flag_name}: {e}")
-            df[flag_name] = 0
-    
-    return df
+    flag_names, flags = _flag_block(df, flag_configs)
+    return _append_block(df, flag_names, flags)
 
 
 def encode_categoricals(
@@ -85,7 +190,7 @@ def encode_categoricals(
     Returns:
         Tuple of (encoded DataFrame, encoders dict)
     """
-    df = df.copy()
+    df = df.copy(deep=False)  # Filled columns are reassigned, never written in place
     
     if encoders is None:
         encoders = {}
@@ -98,29 +203,48 @@ def encode_categoricals(
         if col not in encoders:
             encoders[col] = LabelEncoder()
         
-        if fit:
-            # Handle missing values
-            df[col] = df[col].fillna("Unknown")
-            encoders[col].fit(df[col])
-        else:
-            # Handle unseen labels during prediction
-            df[col] = df[col].fillna("Unknown")
-            # Replace unseen labels with a default value
-            known_labels = set(encoders[col].classes_)
-            df[col] = df[col].apply(lambda x: x if x in known_labels else "Unknown")
-        
-        df[col + "_encoded"] = encoders[col].transform(df[col])
+        codes, df[col] = _encode_column(df[col], encoders[col], fit)
+        df[col + "_encoded"] = codes
         logger.debug(f"Encoded {col} -> {col}_encoded")
     
     return df, encoders
 
 
+def apply_scaler_fast(X: np.ndarray, scaler: StandardScaler) -> np.ndarray:
+    """
+    Standardize X with a fitted scaler's statistics, in place for float64 X.
+    
+    Same result as scaler.transform (the same float64 subtract and divide),
+    without sklearn's input validation and copies. Other dtypes are scaled in
+    a float64 copy, so the statistics are never rounded.
+    
+    Args:
+        X: (rows, features) float array; overwritten with the scaled values if float64
+        scaler: Fitted StandardScaler
+    
+    Returns:
+        Scaled float64 array (X itself for float64 input)
+    """
+    if X.shape[1] != scaler.n_features_in_:
+        raise ValueError(
+            f"X has {X.shape[1]} features, but the scaler was fitted on {scaler.n_features_in_}"
+        )
+    if X.dtype != np.float64:
+        X = X.astype(np.float64)
+    if scaler.with_mean:
+        np.subtract(X, scaler.mean_, out=X)
+    if scaler.with_std:
+        np.divide(X, scaler.scale_, out=X)
+    return X
+
+
 def prepare_features(
     df: pd.DataFrame,
     config: Optional[Dict] = None,
     scaler: Optional[StandardScaler] = None,
     encoders: Optional[Dict] = None,
-    fit: bool = True
+    fit: bool = True,
+    cache: bool = False
 ) -> Tuple[pd.DataFrame, StandardScaler, Dict]:
     """
     Complete feature engineering pipeline.
@@ -131,80 +255,96 @@ def prepare_features(
         scaler: Optional pre-fitted scaler
         encoders: Optional pre-fitted encoders
         fit: Whether to fit scaler/encoders
+        cache: Reuse the result of an earlier cached call on this same DataFrame
+               object (with the same shape, columns and arguments). Only safe if
+               df is not modified in place between calls.
     
     Returns:
         Tuple of (feature DataFrame, scaler, encoders)
     """
+    if cache:
+        # Keyed on object identity rather than data bytes: hashing the data would
+        # cost as much as preparing it. The weakref guards against id() reuse.
+        key = (id(df), df.shape, tuple(df.columns), fit, id(config), id(scaler), id(encoders))
+        entry = _PREPARED_CACHE.get(key)
+        if entry is not None and entry[0]() is df:
+            _PREPARED_CACHE.move_to_end(key)
+            X_scaled, scaler, encoders = entry[1]
+            logger.info(f"Reusing prepared features. Shape: {X_scaled.shape}")
+            return X_scaled.copy(deep=False), scaler, encoders
+        
+        result = prepare_features(df, config, scaler, encoders, fit)
+        _PREPARED_CACHE[key] = (weakref.ref(df), result)
+        while len(_PREPARED_CACHE) > _PREPARED_CACHE_SIZE:
+            _PREPARED_CACHE.popitem(last=False)
+        X_scaled, scaler, encoders = result
+        return X_scaled.copy(deep=False), scaler, encoders
+    
     if config is None:
-        from models.model_config import FEATURE_CONFIG
         config = FEATURE_CONFIG
     
-    df = df.copy()
-    
-    # Create interaction features
-    if "interaction_features" in config:
-        df = create_interaction_features(df, config["interaction_features"])
-    
-    # Create binary flags
-    if "binary_flags" in config:
-        df = create_binary_flags(df, config["binary_flags"])
-    
-    # Encode categoricals
-    if "categorical_columns" in config:
-        df, encoders = encode_categoricals(
-            df,
-            config["categorical_columns"],
-            encoders=encoders,
-            fit=fit
-        )
-    
-    # Select feature columns
+    # Each feature group is computed straight into a block of the matrix; the
+    # derived columns are never inserted into df (column inserts dominated the
+    # cost of this function). Block order: numeric, interactions, flags, encoded.
     feature_cols = []
+    blocks = []
     
-    # Add numeric columns
+    # Numeric columns
     if "numeric_columns" in config:
-        feature_cols.extend([col for col in config["numeric_columns"] if col in df.columns])
+        numeric_cols = [col for col in config["numeric_columns"] if col in df.columns]
+        feature_cols.extend(numeric_cols)
+        blocks.append(df[numeric_cols].to_numpy(dtype=np.float64, na_value=0.0))
     
-    # Add interaction features
+    # Interaction features
     if "interaction_features" in config:
-        for col1, col2 in config["interaction_features"]:
-            interaction_name = f"{col1}_x_{col2}"
-            if interaction_name in df.columns:
-                feature_cols.append(interaction_name)
+        interaction_names, products = _interaction_block(df, config["interaction_features"])
+        products[np.isnan(products)] = 0.0
+        feature_cols.extend(interaction_names)
+        blocks.append(products)
     
-    # Add binary flags
+    # Binary flags
     if "binary_flags" in config:
-        feature_cols.extend(config["binary_flags"].keys())
+        flag_names, flags = _flag_block(df, config["binary_flags"])
+        feature_cols.extend(flag_names)
+        blocks.append(flags)
     
-    # Add encoded categoricals
+    # Encoded categoricals
     if "categorical_columns" in config:
+        if encoders is None:
+            encoders = {}
+        codes = []
         for col in config["categorical_columns"]:
-            encoded_col = col + "_encoded"
-            if encoded_col in df.columns:
-                feature_cols.append(encoded_col)
-    
-    # Extract feature matrix
-    X = df[feature_cols].copy()
-    
-    # Handle missing values
-    X = X.fillna(0)
-    
-    # Scale numeric features
+            if col not in df.columns:
+                logger.warning(f"Column {col} not found. Skipping encoding.")
+                continue
+            if col not in encoders:
+                encoders[col] = LabelEncoder()
+            codes.append(_encode_column(df[col], encoders[col], fit)[0])
+            feature_cols.append(col + "_encoded")
+        blocks.append(np.column_stack(codes) if codes else np.empty((len(df), 0)))
+    
+    # Assemble the feature matrix, with missing values as 0. Scaling runs in
+    # float64 and column-major (the layout of a DataFrame's values, so a fitted
+    # scaler sums in the same order), matching the saved models' features exactly.
+    X = np.empty((len(df), len(feature_cols)), dtype=np.float64, order="F")
+    start = 0
+    for block in blocks:
+        X[:, start:start + block.shape[1]] = block
+        start += block.shape[1]
+    
+    # Scale numeric features (in place: X is already a private copy)
     if scaler is None:
-        scaler = StandardScaler()
+        scaler = StandardScaler(copy=False)
     
     if fit:
-        X_scaled = pd.DataFrame(
-            scaler.fit_transform(X),
-            columns=X.columns,
-            index=X.index
-        )
+        scaler.fit(X)
+        X = scaler.transform(X, copy=False)
     else:
-        X_scaled = pd.DataFrame(
-            scaler.transform(X),
-            columns=X.columns,
-            index=X.index
-        )
+        X = apply_scaler_fast(X, scaler)
+    
+    # Kept in float64: XGBoost and scikit-learn trees round to float32 themselves,
+    # but LightGBM compares float64 values against its split thresholds
+    X_scaled = pd.DataFrame(X, columns=feature_cols, index=df.index)
     
     logger.info(f"Prepared {len(feature_cols)} features. Shape: {X_scaled.shape}")
     
@@ -244,6 +384,33 @@ def split_data(
     return X_train, X_test, y_train, y_test
 
 
+def split_indices(
+    n_rows: int,
+    test_size: float = 0.2,
+    random_seed: int = 42,
+    stratify: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Train/test row positions, the same split split_data makes for n_rows rows.
+    
+    Computing positions once lets several targets share one split of X.
+    
+    Args:
+        n_rows: Number of rows to split
+        test_size: Proportion for test set
+        random_seed: Random seed
+        stratify: Optional stratification variable
+    
+    Returns:
+        Tuple of (train positions, test positions)
+    """
+    train_idx, test_idx = train_test_split(
+        np.arange(n_rows), test_size=test_size, random_state=random_seed, stratify=stratify
+    )
+    logger.info(f"Train set: {len(train_idx)} samples, Test set: {len(test_idx)} samples")
+    return train_idx, test_idx
+
+
 def save_preprocessing_artifacts(
     scaler: StandardScaler,
     encoders: Dict,
@@ -264,12 +431,7 @@ def save_preprocessing_artifacts(
     joblib.dump(scaler, output_path / "scaler.pkl")
     logger.info(f"Saved scaler to {output_path / 'scaler.pkl'}")
     
-    # Save encoders
-    for col_name, encoder in encoders.items():
-        joblib.dump(encoder, output_path / f"{col_name}_encoder.pkl")
-        logger.info(f"Saved {col_name} encoder")
-    
-    # Save all encoders together
+    # Save all encoders together (load_preprocessing_artifacts reads only this file)
     joblib.dump(encoders, output_path / "encoders.pkl")
     logger.info(f"Saved all encoders to {output_path / 'encoders.pkl'}")
 
@@ -36,14 +36,16 @@ MODEL_CONFIGS = {
         "expected_mae": 3.0
     },
     "grad_rate": {
-        "model_type": "rf_regressor",
+        "model_type": "hgb_regressor",
         "target": "grad_rate_change",
         "hyperparameters": {
-            "n_estimators": 200,
+            "max_iter": 200,
             "max_depth": 8,
-            "min_samples_split": 5,
-            "random_state": 42,
-            "n_jobs": -1
+            "learning_rate": 0.05,
+            "early_stopping": True,
+            "validation_fraction": 0.1,
+            "scoring": "r2",
+            "random_state": 42
         },
         "expected_r2": 0.60,
         "expected_mae": 1.0
@@ -73,15 +75,20 @@ FEATURE_CONFIG = {
         ("min_wage_change", "childcare_subsidy"),
         ("enrollment", "pct_low_income")
     ],
+    # Each flag is 1 when all of its (column, operator, threshold, default)
+    # conditions hold; default stands in for a column missing from the data
     "binary_flags": {
         "high_risk_institution": {
-            "condition": lambda df: (df.get("pct_low_income", 0) > 50) & (df.get("baseline_grad_rate", 100) < 50)
+            "conditions": [
+                ("pct_low_income", ">", 50, 0),
+                ("baseline_grad_rate", "<", 50, 100)
+            ]
         },
         "minority_serving": {
-            "condition": lambda df: df.get("pct_minority", 0) > 50
+            "conditions": [("pct_minority", ">", 50, 0)]
         },
         "small_enrollment": {
-            "condition": lambda df: df.get("enrollment", 10000) < 2000
+            "conditions": [("enrollment", "<", 2000, 10000)]
         }
     },
     "categorical_columns": ["state", "institution_type"],
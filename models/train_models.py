@@ -10,126 +10,297 @@ from pathlib import Path
 import joblib
 import json
 from sklearn.metrics import (
-    r2_score, mean_absolute_error, mean_squared_error,
-    accuracy_score, f1_score, classification_report, confusion_matrix
+    r2_score, mean_absolute_error, root_mean_squared_error,
+    classification_report, confusion_matrix
 )
-from sklearn.model_selection import cross_val_score
+from sklearn.model_selection import KFold, StratifiedKFold, cross_val_score
 import xgboost as xgb
 import lightgbm as lgb
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import HistGradientBoostingRegressor
 import shap
 import matplotlib.pyplot as plt
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 
-from models.model_config import MODEL_CONFIGS, TRAINING_CONFIG
+from models.model_config import MODEL_CONFIGS, TRAINING_CONFIG, FEATURE_CONFIG
 from models.feature_engineering import (
-    prepare_features, split_data, save_preprocessing_artifacts
+    prepare_features, split_indices, save_preprocessing_artifacts
 )
+from utils.io import fresh_sibling
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# pyarrow is optional; training data falls back to CSV parsing without it
+try:
+    import pyarrow.ipc as paipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+def _training_columns() -> Optional[List[str]]:
+    """
+    Columns of the training data that feature preparation and the model targets use.
+    
+    Returns:
+        Column names, or None when a legacy callable binary flag makes the
+        set unknowable (read everything then)
+    """
+    columns = list(FEATURE_CONFIG["numeric_columns"]) + list(FEATURE_CONFIG["categorical_columns"])
+    for col1, col2 in FEATURE_CONFIG["interaction_features"]:
+        columns += [col1, col2]
+    for flag_config in FEATURE_CONFIG["binary_flags"].values():
+        if "conditions" not in flag_config:
+            return None
+        columns += [condition[0] for condition in flag_config["conditions"]]
+    columns += [config["target"] for config in MODEL_CONFIGS.values()]
+    return list(dict.fromkeys(columns))
+
+
+def _present_columns(available: List[str], columns: Optional[List[str]]) -> Optional[List[str]]:
+    """Requested columns that exist in a file's schema, in file order (None means all)."""
+    if columns is None:
+        return None
+    wanted = set(columns)
+    return [col for col in available if col in wanted]
+
+
+def load_training_frame(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load training data from CSV, Feather/Arrow or Parquet (by file suffix).
+    
+    For a CSV path, the Feather copy written next to it by
+    create_training_data is read instead when it is at least as new as the
+    CSV, which skips CSV parsing entirely.
+    
+    Args:
+        path: Path to the training data file
+        columns: Optional columns to read; others are never parsed or
+                 materialized. Names missing from the file are ignored.
+    
+    Returns:
+        Training DataFrame
+    """
+    path_obj = Path(path)
+    suffix = path_obj.suffix.lower()
+    
+    if suffix == ".parquet":
+        return pd.read_parquet(
+            path_obj, columns=_present_columns(pq.read_schema(path_obj).names, columns)
+        )
+    
+    feather_path = path_obj
+    if suffix not in (".feather", ".arrow"):
+        feather_path = fresh_sibling(path_obj, ".feather") if PYARROW_AVAILABLE else None
+        if feather_path is None:
+            if columns is None:
+                return pd.read_csv(path_obj)
+            wanted = set(columns)
+            return pd.read_csv(path_obj, usecols=lambda col: col in wanted)
+        logger.info(f"Reading Feather copy {feather_path}")
+    
+    with paipc.open_file(feather_path) as reader:
+        available = reader.schema.names
+    return pd.read_feather(feather_path, columns=_present_columns(available, columns))
+
+
+# Rounds without improvement after which native CV stops boosting
+_CV_EARLY_STOPPING_ROUNDS = 20
+
+
+def _xgb_r2(predt: np.ndarray, dmatrix: "xgb.DMatrix"):
+    """R² as an xgb.cv custom metric."""
+    return "r2", r2_score(dmatrix.get_label(), predt)
+
+
+def _lgb_r2(preds: np.ndarray, dataset: "lgb.Dataset"):
+    """R² as an lgb.cv feval (higher is better)."""
+    return "r2", r2_score(dataset.get_label(), preds), True
+
+
+def _xgb_cv(model, X_train, y_train, folds, **cv_kwargs) -> dict:
+    """
+    Cross-validate an XGBoost sklearn model with native xgb.cv.
+    
+    All folds are boosted together from one DMatrix and stop early once the
+    validation metric stalls, instead of refitting the wrapper per fold.
+    
+    Args:
+        model: Unfitted XGBRegressor/XGBClassifier carrying the hyperparameters
+        X_train: Training features
+        y_train: Training target
+        folds: sklearn splitter defining the folds
+        **cv_kwargs: Extra xgb.cv arguments (metrics, custom_metric, maximize)
+    
+    Returns:
+        xgb.cv history, truncated at the best round
+    """
+    params = {k: v for k, v in model.get_xgb_params().items() if v is not None}
+    return xgb.cv(
+        params,
+        xgb.DMatrix(X_train, label=y_train),
+        num_boost_round=model.n_estimators,
+        folds=folds,
+        early_stopping_rounds=_CV_EARLY_STOPPING_ROUNDS,
+        as_pandas=False,
+        **cv_kwargs
+    )
+
 
 def train_tuition_model(X_train, y_train, X_test, y_test, config):
     """Train XGBoost regressor for tuition change prediction."""
     logger.info("Training Tuition Change Model (XGBoost)...")
     
     model = xgb.XGBRegressor(**config["hyperparameters"])
+    
+    # Cross-validation
+    cv_results = _xgb_cv(
+        model, X_train, y_train, KFold(n_splits=TRAINING_CONFIG["cv_folds"]),
+        custom_metric=_xgb_r2, maximize=True
+    )
+    cv_r2_mean = cv_results["test-r2-mean"][-1]
+    cv_r2_std = cv_results["test-r2-std"][-1]
+    cv_rounds = len(cv_results["test-r2-mean"])
+    logger.info(f"CV R² (mean ± std): {cv_r2_mean:.4f} ± {cv_r2_std:.4f} at {cv_rounds} rounds")
+    
+    # Fit with the round count CV stopped at, so the saved model is the one scored
+    model.set_params(n_estimators=cv_rounds)
     model.fit(X_train, y_train)
     
     # Evaluate
     y_pred = model.predict(X_test)
     r2 = r2_score(y_test, y_pred)
     mae = mean_absolute_error(y_test, y_pred)
-    rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+    rmse = root_mean_squared_error(y_test, y_pred)
     
     logger.info(f"R² Score: {r2:.4f}")
     logger.info(f"MAE: {mae:.4f}%")
     logger.info(f"RMSE: {rmse:.4f}%")
     
-    # Cross-validation
-    cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring='r2')
-    logger.info(f"CV R² (mean ± std): {cv_scores.mean():.4f} ± {cv_scores.std():.4f}")
+    # The SHAP summary plot is drawn by main: pyplot must stay on the main thread
+    return model, {
+        "r2": float(r2),
+        "mae": float(mae),
+        "rmse": float(rmse),
+        "cv_r2_mean": float(cv_r2_mean),
+        "cv_r2_std": float(cv_r2_std),
+        "cv_rounds": cv_rounds
+    }
+
+
+def save_shap_summary_plot(model, X_test, output_path: str):
+    """
+    Save a SHAP feature-importance (bar) summary plot for a tree model.
     
-    # SHAP values
-    explainer = shap.TreeExplainer(model)
-    shap_values = explainer.shap_values(X_test[:100])  # Sample for speed
+    Uses pyplot, so call it from the main thread (GUI backends cannot create
+    figures elsewhere).
+    
+    Args:
+        model: Fitted tree model
+        X_test: Features to explain
+        output_path: Path of the PNG to write
+    """
+    # SHAP values over the whole test set: path-dependent TreeSHAP needs no
+    # background data, and the additivity check would cost an extra predict pass
+    explainer = shap.TreeExplainer(model, feature_perturbation="tree_path_dependent")
+    shap_values = explainer.shap_values(X_test, check_additivity=False)
     
     # Summary plot
     plt.figure(figsize=(10, 8))
-    shap.summary_plot(shap_values, X_test[:100], show=False, plot_type="bar")
+    shap.summary_plot(shap_values, X_test, show=False, plot_type="bar")
     plt.tight_layout()
-    plt.savefig("outputs/visualizations/tuition_shap_summary.png", dpi=150, bbox_inches='tight')
+    plt.savefig(output_path, dpi=150, bbox_inches='tight')
     plt.close()
     logger.info("Saved SHAP summary plot")
-    
-    return model, {
-        "r2": float(r2),
-        "mae": float(mae),
-        "rmse": float(rmse),
-        "cv_r2_mean": float(cv_scores.mean()),
-        "cv_r2_std": float(cv_scores.std())
-    }
 
 
 def train_enrollment_model(X_train, y_train, X_test, y_test, config):
     """Train LightGBM regressor for enrollment change prediction."""
     logger.info("Training Enrollment Change Model (LightGBM)...")
     
-    model = lgb.LGBMRegressor(**config["hyperparameters"])
+    # Cross-validation (native lgb.cv: folds boosted together, early stopping)
+    params = dict(config["hyperparameters"], objective="regression", metric="None")
+    num_boost_round = params.pop("n_estimators")
+    cv_results = lgb.cv(
+        params,
+        lgb.Dataset(X_train, label=y_train),
+        num_boost_round=num_boost_round,
+        folds=list(KFold(n_splits=TRAINING_CONFIG["cv_folds"]).split(X_train)),
+        feval=_lgb_r2,
+        callbacks=[lgb.early_stopping(_CV_EARLY_STOPPING_ROUNDS, verbose=False)]
+    )
+    cv_r2_mean = cv_results["valid r2-mean"][-1]
+    cv_r2_std = cv_results["valid r2-stdv"][-1]
+    cv_rounds = len(cv_results["valid r2-mean"])
+    logger.info(f"CV R² (mean ± std): {cv_r2_mean:.4f} ± {cv_r2_std:.4f} at {cv_rounds} rounds")
+    
+    # Fit with the round count CV stopped at, so the saved model is the one scored
+    model = lgb.LGBMRegressor(**dict(config["hyperparameters"], n_estimators=cv_rounds))
     model.fit(X_train, y_train)
     
     # Evaluate
     y_pred = model.predict(X_test)
     r2 = r2_score(y_test, y_pred)
     mae = mean_absolute_error(y_test, y_pred)
-    rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+    rmse = root_mean_squared_error(y_test, y_pred)
     
     logger.info(f"R² Score: {r2:.4f}")
     logger.info(f"MAE: {mae:.4f}%")
     logger.info(f"RMSE: {rmse:.4f}%")
     
-    # Cross-validation
-    cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring='r2')
-    logger.info(f"CV R² (mean ± std): {cv_scores.mean():.4f} ± {cv_scores.std():.4f}")
-    
     return model, {
         "r2": float(r2),
         "mae": float(mae),
         "rmse": float(rmse),
-        "cv_r2_mean": float(cv_scores.mean()),
-        "cv_r2_std": float(cv_scores.std())
+        "cv_r2_mean": float(cv_r2_mean),
+        "cv_r2_std": float(cv_r2_std),
+        "cv_rounds": cv_rounds
     }
 
 
 def train_grad_rate_model(X_train, y_train, X_test, y_test, config):
-    """Train Random Forest regressor for graduation rate change prediction."""
-    logger.info("Training Graduation Rate Model (Random Forest)...")
+    """Train histogram gradient boosting regressor for graduation rate change prediction."""
+    logger.info("Training Graduation Rate Model (HistGradientBoosting)...")
     
-    model = RandomForestRegressor(**config["hyperparameters"])
+    model = HistGradientBoostingRegressor(**config["hyperparameters"])
     model.fit(X_train, y_train)
     
     # Evaluate
     y_pred = model.predict(X_test)
     r2 = r2_score(y_test, y_pred)
     mae = mean_absolute_error(y_test, y_pred)
-    rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+    rmse = root_mean_squared_error(y_test, y_pred)
     
     logger.info(f"R² Score: {r2:.4f}")
     logger.info(f"MAE: {mae:.4f}%")
     logger.info(f"RMSE: {rmse:.4f}%")
     
-    # Cross-validation
-    cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring='r2')
+    # Cross-validation (histogram boosting refits cheaply, so each fold is a full fit)
+    cv_scores = cross_val_score(
+        model, X_train, y_train, cv=KFold(n_splits=TRAINING_CONFIG["cv_folds"]), scoring="r2"
+    )
     logger.info(f"CV R² (mean ± std): {cv_scores.mean():.4f} ± {cv_scores.std():.4f}")
     
-    return model, {
+    model_metrics = {
         "r2": float(r2),
         "mae": float(mae),
         "rmse": float(rmse),
         "cv_r2_mean": float(cv_scores.mean()),
-        "cv_r2_std": float(cv_scores.std())
+        "cv_r2_std": float(cv_scores.std()),
+        "n_iter": int(model.n_iter_)
     }
+    
+    # R² on the held-out validation fraction used for early stopping, instead
+    # of refitting per fold
+    if getattr(model, "do_early_stopping_", False):
+        model_metrics["validation_r2"] = float(model.validation_score_[-1])
+        logger.info(f"Validation R²: {model_metrics['validation_r2']:.4f} after {model.n_iter_} iterations")
+    
+    return model, model_metrics
 
 
 def train_equity_model(X_train, y_train, X_test, y_test, config):
@@ -137,41 +308,73 @@ def train_equity_model(X_train, y_train, X_test, y_test, config):
     logger.info("Training Equity Risk Model (XGBoost Classifier)...")
     
     model = xgb.XGBClassifier(**config["hyperparameters"])
+    
+    # Cross-validation (accuracy = 1 - multiclass error)
+    cv_results = _xgb_cv(
+        model, X_train, y_train, StratifiedKFold(n_splits=TRAINING_CONFIG["cv_folds"]),
+        metrics="merror"
+    )
+    cv_accuracy_mean = 1 - cv_results["test-merror-mean"][-1]
+    cv_accuracy_std = cv_results["test-merror-std"][-1]
+    cv_rounds = len(cv_results["test-merror-mean"])
+    logger.info(f"CV Accuracy (mean ± std): {cv_accuracy_mean:.4f} ± {cv_accuracy_std:.4f} at {cv_rounds} rounds")
+    
+    # Fit with the round count CV stopped at, so the saved model is the one scored
+    model.set_params(n_estimators=cv_rounds)
     model.fit(X_train, y_train)
     
-    # Evaluate
+    # Evaluate: accuracy and weighted F1 both come from one confusion matrix
+    # over the labels present in either array
     y_pred = model.predict(X_test)
-    accuracy = accuracy_score(y_test, y_pred)
-    f1 = f1_score(y_test, y_pred, average='weighted')
+    unique_labels = np.union1d(y_test, y_pred).tolist()
+    cm = confusion_matrix(y_test, y_pred, labels=unique_labels)
+    hits = np.diag(cm)
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+    accuracy = hits.sum() / cm.sum()
+    # Per-class F1 = 2TP / (2TP + FP + FN); 0 for classes never seen or predicted
+    f1_per_class = np.divide(
+        2 * hits, support + predicted,
+        out=np.zeros(len(hits)), where=(support + predicted) > 0
+    )
+    f1 = np.average(f1_per_class, weights=support)
     
     logger.info(f"Accuracy: {accuracy:.4f}")
     logger.info(f"F1 Score (weighted): {f1:.4f}")
     
     # Classification report - handle cases where not all classes are present
-    unique_labels = sorted(list(set(y_test) | set(y_pred)))
     available_labels = [config["class_labels"][i] for i in unique_labels if i < len(config["class_labels"])]
     report = classification_report(y_test, y_pred, labels=unique_labels, target_names=available_labels, output_dict=True, zero_division=0)
     logger.info("\nClassification Report:")
-    logger.info(classification_report(y_test, y_pred, labels=unique_labels, target_names=available_labels, zero_division=0))
+    for label in available_labels:
+        scores = report[label]
+        logger.info(
+            f"{label:>10}  precision={scores['precision']:.2f}  recall={scores['recall']:.2f}  "
+            f"f1={scores['f1-score']:.2f}  support={scores['support']}"
+        )
     
-    # Confusion matrix
-    cm = confusion_matrix(y_test, y_pred)
     logger.info(f"\nConfusion Matrix:\n{cm}")
     
-    # Cross-validation
-    cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring='accuracy')
-    logger.info(f"CV Accuracy (mean ± std): {cv_scores.mean():.4f} ± {cv_scores.std():.4f}")
-    
     return model, {
         "accuracy": float(accuracy),
         "f1_weighted": float(f1),
         "classification_report": report,
         "confusion_matrix": cm.tolist(),
-        "cv_accuracy_mean": float(cv_scores.mean()),
-        "cv_accuracy_std": float(cv_scores.std())
+        "cv_accuracy_mean": float(cv_accuracy_mean),
+        "cv_accuracy_std": float(cv_accuracy_std),
+        "cv_rounds": cv_rounds
     }
 
 
+# Training function for each model in MODEL_CONFIGS
+_TRAINERS = {
+    "tuition": train_tuition_model,
+    "enrollment": train_enrollment_model,
+    "grad_rate": train_grad_rate_model,
+    "equity": train_equity_model
+}
+
+
 def main(
     training_data_path: str = "outputs/training_data.csv",
     output_dir: str = "models/saved_models"
@@ -180,12 +383,12 @@ def main(
     Main training function.
     
     Args:
-        training_data_path: Path to training data CSV
+        training_data_path: Path to training data (CSV, Feather or Parquet)
         output_dir: Directory to save models
     """
     # Load training data
     logger.info(f"Loading training data from {training_data_path}...")
-    df = pd.read_csv(training_data_path)
+    df = load_training_frame(training_data_path, columns=_training_columns())
     logger.info(f"Loaded {len(df)} training samples")
     
     # Prepare features
@@ -199,6 +402,15 @@ def main(
     models = {}
     metrics = {}
     
+    # The regression models only differ in y, so they share one row split
+    shared_split = split_indices(
+        len(X),
+        test_size=TRAINING_CONFIG["test_size"],
+        random_seed=TRAINING_CONFIG["random_seed"]
+    )
+    
+    # Build each model's training set, then train them concurrently
+    tasks = []
     for model_name, config in MODEL_CONFIGS.items():
         target = config["target"]
         
@@ -206,49 +418,74 @@ def main(
             logger.warning(f"Target {target} not found. Skipping {model_name} model.")
             continue
         
-        y = df[target]
+        if model_name not in _TRAINERS:
+            continue
         
-        # For classification, encode labels
+        # Target as a plain contiguous array: float32 for regression (the
+        # boosters use float32 labels internally), int8 class codes for classification
         if config["model_type"] == "xgb_classifier":
             from sklearn.preprocessing import LabelEncoder
             label_encoder = LabelEncoder()
-            y_encoded = label_encoder.fit_transform(y)
+            y_values = label_encoder.fit_transform(df[target]).astype(np.int8)
             joblib.dump(label_encoder, Path(output_dir) / f"{model_name}_label_encoder.pkl")
         else:
-            y_encoded = y
+            y_values = df[target].to_numpy(dtype=np.float32)
         
         # Split data
         stratify = None
         if TRAINING_CONFIG.get("stratify_by") and model_name == "equity":
             # Create stratification variable for equity model
-            stratify = y_encoded
+            stratify = y_values
         
-        X_train, X_test, y_train, y_test = split_data(
-            X, y_encoded,
-            test_size=TRAINING_CONFIG["test_size"],
-            random_seed=TRAINING_CONFIG["random_seed"],
-            stratify=stratify
-        )
-        
-        # Train model
-        if model_name == "tuition":
-            model, model_metrics = train_tuition_model(X_train, y_train, X_test, y_test, config)
-        elif model_name == "enrollment":
-            model, model_metrics = train_enrollment_model(X_train, y_train, X_test, y_test, config)
-        elif model_name == "grad_rate":
-            model, model_metrics = train_grad_rate_model(X_train, y_train, X_test, y_test, config)
-        elif model_name == "equity":
-            model, model_metrics = train_equity_model(X_train, y_train, X_test, y_test, config)
+        if stratify is not None:
+            train_idx, test_idx = split_indices(
+                len(X),
+                test_size=TRAINING_CONFIG["test_size"],
+                random_seed=TRAINING_CONFIG["random_seed"],
+                stratify=stratify
+            )
         else:
-            continue
+            train_idx, test_idx = shared_split
         
-        # Save model
-        model_path = Path(output_dir) / f"{model_name}_model.pkl"
-        joblib.dump(model, model_path)
-        logger.info(f"Saved {model_name} model to {model_path}")
+        X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+        y_train, y_test = y_values[train_idx], y_values[test_idx]
+        tasks.append((model_name, config, (X_train, y_train, X_test, y_test)))
+    
+    # One thread per model, each with an equal share of the cores (the tree
+    # libraries release the GIL while fitting; HistGradientBoosting has no
+    # n_jobs and uses its OpenMP default)
+    threads_per_model = max(1, (os.cpu_count() or 1) // max(1, len(tasks)))
+    with ThreadPoolExecutor(max_workers=max(1, len(tasks))) as executor:
+        futures = []
+        for model_name, config, data in tasks:
+            if "n_jobs" in config["hyperparameters"]:
+                config = dict(
+                    config,
+                    hyperparameters=dict(config["hyperparameters"], n_jobs=threads_per_model)
+                )
+            futures.append(executor.submit(_TRAINERS[model_name], *data, config))
         
-        models[model_name] = model
-        metrics[model_name] = model_metrics
+        for (model_name, _, data), future in zip(tasks, futures):
+            model, model_metrics = future.result()
+            
+            # Plotting stays on this (main) thread; the other models keep training
+            if model_name == "tuition":
+                save_shap_summary_plot(model, data[2], "outputs/visualizations/tuition_shap_summary.png")
+            
+            # Save model
+            model_path = Path(output_dir) / f"{model_name}_model.pkl"
+            joblib.dump(model, model_path)
+            logger.info(f"Saved {model_name} model to {model_path}")
+            
+            # Native-format copy (written after the pickle, so never older than it);
+            # predict_impact loads it in preference to unpickling the sklearn wrapper
+            if isinstance(model, xgb.XGBModel):
+                model.save_model(model_path.with_suffix(".ubj"))
+            elif isinstance(model, lgb.LGBMModel):
+                model.booster_.save_model(model_path.with_suffix(".txt"))
+            
+            models[model_name] = model
+            metrics[model_name] = model_metrics
     
     # Save metadata
     metadata = {
@@ -4,14 +4,21 @@ Box API Client
 Purpose: Interface with Box Content Cloud for bill storage and retrieval
 """
 
+import json
 import os
+import random
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 import logging
 
 # Box SDK is optional
 try:
     from boxsdk import Client, OAuth2, JWTAuth
+    from boxsdk.config import API
     from boxsdk.exception import BoxAPIException
     BOX_SDK_AVAILABLE = True
 except ImportError:
@@ -22,6 +29,163 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Concurrent downloads for batch bill ingestion (Box allows ~10 requests/s per user)
+_DOWNLOAD_WORKERS = 8
+
+# Retry policy for rate-limited (429) and failed (5xx) Box API calls
+_RETRY_ATTEMPTS = 6
+_RETRY_BASE_DELAY = 1.0
+
+# Let the SDK's own per-request retries (which honor Retry-After) run as long as
+# ours. boxsdk reads the class attribute API.MAX_RETRY_ATTEMPTS directly in
+# Session and JWTAuth, not a per-session config, so it can only be set
+# process-wide; it is raised once here, at import, never lowered
+if BOX_SDK_AVAILABLE:
+    API.MAX_RETRY_ATTEMPTS = max(API.MAX_RETRY_ATTEMPTS, _RETRY_ATTEMPTS)
+
+# How long a folder's filename -> file ID index is trusted, in seconds
+_FILE_INDEX_TTL = 300
+
+# Search results checked for an exact filename match (search is fuzzy)
+_SEARCH_RESULTS = 10
+
+# Fetched folder objects kept per client (LRU), and for how long, in seconds
+_FOLDER_CACHE_SIZE = 64
+_FOLDER_CACHE_TTL = 600
+
+# Box access tokens live ~60 minutes; treat them as expired a little early
+_TOKEN_LIFETIME = 3000
+
+# (client ID, enterprise ID) -> (JWT access token, expiry time), shared by every
+# BoxClient in the process so each one skips the JWT exchange while it is valid
+_TOKEN_CACHE: Dict[Tuple[str, str], Tuple[str, float]] = {}
+
+# On-disk copy of the token cache (owner-only), so new processes skip the exchange too
+_TOKEN_CACHE_PATH = Path.home() / ".cache" / "caldatathon" / "box_token.json"
+
+# Cached tokens this close to expiry, in seconds, are not reused
+_TOKEN_EXPIRY_MARGIN = 60
+
+# Uploads larger than this use Box's chunked upload sessions (its documented 20 MB minimum)
+_CHUNKED_UPLOAD_THRESHOLD = 20 * 1024 * 1024
+
+
+def _retry_delay(error: "BoxAPIException", attempt: int, base: float) -> float:
+    """Seconds to wait before retrying: Box's Retry-After if sent, else jittered exponential backoff."""
+    headers = error.headers
+    if headers is None and error.network_response is not None:
+        headers = error.network_response.headers
+    retry_after = (headers or {}).get("Retry-After")
+    if retry_after is not None:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            pass
+    return base * 2 ** attempt * random.uniform(0.5, 1.5)
+
+
+def _box_retry(fn, *args, max_attempts: int = _RETRY_ATTEMPTS, base: float = _RETRY_BASE_DELAY, **kwargs):
+    """
+    Call fn(*args, **kwargs), retrying when Box rate-limits it or fails server-side.
+    
+    boxsdk already retries each HTTP request; this covers whole operations
+    (paged listings, streamed transfers) that still fail after those retries,
+    so one 429 does not abort a batch. Other errors are raised immediately.
+    
+    Args:
+        fn: Box API call to make
+        max_attempts: Attempts before the last error is raised
+        base: Initial backoff in seconds, doubled on each attempt
+    
+    Returns:
+        Result of fn
+    """
+    for attempt in range(max_attempts):
+        try:
+            return fn(*args, **kwargs)
+        except BoxAPIException as e:
+            status = e.status or 0
+            if attempt == max_attempts - 1 or not (status == 429 or status >= 500):
+                raise
+            delay = _retry_delay(e, attempt, base)
+            logger.warning(
+                f"Box API returned {status}; retrying in {delay:.1f}s "
+                f"(attempt {attempt + 1}/{max_attempts})"
+            )
+            time.sleep(delay)
+
+
+def _load_cached_token(token_key: Tuple[str, str]) -> Optional[str]:
+    """Unexpired cached access token for (client ID, enterprise ID), from memory or disk."""
+    cached = _TOKEN_CACHE.get(token_key)
+    if cached is None:
+        try:
+            data = json.loads(_TOKEN_CACHE_PATH.read_text())
+            if (data["client_id"], data["enterprise_id"]) == token_key:
+                cached = (data["token"], float(data["exp"]))
+                _TOKEN_CACHE[token_key] = cached
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+    if cached is None or cached[1] <= time.time() + _TOKEN_EXPIRY_MARGIN:
+        return None
+    return cached[0]
+
+
+def _store_cached_token(token_key: Tuple[str, str], access_token: str) -> None:
+    """Cache a newly issued access token in memory and in the on-disk cache file."""
+    expires = time.time() + _TOKEN_LIFETIME
+    _TOKEN_CACHE[token_key] = (access_token, expires)
+    
+    try:
+        _TOKEN_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+        # Created 0600 from the start and renamed into place, so the token is
+        # never readable by others and readers never see a partial file
+        tmp_path = _TOKEN_CACHE_PATH.with_suffix(f".{os.getpid()}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({
+                "client_id": token_key[0],
+                "enterprise_id": token_key[1],
+                "token": access_token,
+                "exp": expires
+            }, f)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, _TOKEN_CACHE_PATH)
+    except OSError as e:
+        logger.warning(f"Could not cache Box token at {_TOKEN_CACHE_PATH}: {e}")
+
+
+def _list_items(folder, **kwargs) -> list:
+    """All items of a Box folder, fetching every page."""
+    return list(folder.get_items(**kwargs))
+
+
+def _download_file(file_item, output_path: str) -> None:
+    """Stream a Box file to output_path, creating parent directories."""
+    output_path_obj = Path(output_path)
+    output_path_obj.parent.mkdir(parents=True, exist_ok=True)
+    
+    with open(output_path, "wb") as f:
+        file_item.download_to(f)
+
+
+def _upload_file(folder, file_path: str, file_name: str):
+    """
+    Upload a local file into a Box folder under file_name.
+    
+    Files above _CHUNKED_UPLOAD_THRESHOLD go through an upload session instead
+    of one large request. boxsdk's chunked uploader reads the fixed-size parts
+    one at a time (the stream is shared) and sends them from a pool of
+    API.CHUNK_UPLOAD_THREADS threads; releases before the pinned boxsdk 3.9
+    sent them one after another.
+    """
+    file_size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        if file_size > _CHUNKED_UPLOAD_THRESHOLD:
+            upload_session = folder.create_upload_session(file_size, file_name)
+            return upload_session.get_chunked_uploader_for_stream(f, file_size).start()
+        return folder.upload_stream(f, file_name)
+
 
 class BoxClient:
     """Client for interacting with Box API."""
@@ -35,6 +199,10 @@ class BoxClient:
         """
         self.client = None
         self.auth_type = auth_type
+        # folder ID -> (time indexed, filename -> file ID)
+        self._file_ids: Dict[str, Tuple[float, Dict[str, str]]] = {}
+        # folder ID -> (time fetched, folder), least recently used first
+        self._folders: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
         self._initialize_client()
     
     def _initialize_client(self):
@@ -56,15 +224,27 @@ class BoxClient:
                     logger.warning("Box JWT credentials not found. Box integration disabled.")
                     return
                 
+                # Reuse a cached token (from this or an earlier run) while it is
+                # valid; JWTAuth still re-authenticates by itself once Box rejects
+                # it as expired
+                token_key = (client_id, enterprise_id)
+                cached_token = _load_cached_token(token_key)
+                
+                def store_token(access_token, refresh_token=None):
+                    _store_cached_token(token_key, access_token)
+                
                 auth = JWTAuth(
                     client_id=client_id,
                     client_secret=client_secret,
                     enterprise_id=enterprise_id,
                     jwt_key_id=os.getenv("BOX_JWT_KEY_ID", ""),
                     rsa_private_key_file_sys_path=jwt_key_path,
-                    rsa_private_key_passphrase=os.getenv("BOX_JWT_PASSPHRASE", "")
+                    rsa_private_key_passphrase=os.getenv("BOX_JWT_PASSPHRASE", ""),
+                    store_tokens=store_token,
+                    access_token=cached_token
                 )
-                access_token = auth.authenticate_instance()
+                if cached_token is None:
+                    auth.authenticate_instance()
                 self.client = Client(auth)
                 
             elif self.auth_type == "oauth":
@@ -93,6 +273,81 @@ class BoxClient:
         """Check if Box client is available."""
         return BOX_SDK_AVAILABLE and self.client is not None
     
+    def _folder(self, folder_id: str):
+        """
+        Fetched Box folder object, cached for _FOLDER_CACHE_TTL seconds.
+        
+        Saves the folder GET round-trip on repeated operations in the same folder.
+        """
+        now = time.monotonic()
+        cached = self._folders.get(folder_id)
+        if cached is not None and now - cached[0] < _FOLDER_CACHE_TTL:
+            self._folders.move_to_end(folder_id)
+            return cached[1]
+        
+        folder = _box_retry(self.client.folder(folder_id=folder_id).get)
+        self._folders[folder_id] = (now, folder)
+        self._folders.move_to_end(folder_id)
+        while len(self._folders) > _FOLDER_CACHE_SIZE:
+            self._folders.popitem(last=False)
+        return folder
+    
+    def _folder_file_ids(self, folder_id: str) -> Dict[str, str]:
+        """
+        Filename -> file ID for every file directly in a Box folder.
+        
+        The folder is listed at most once per _FILE_INDEX_TTL seconds; later
+        lookups in the same folder are served from the cached index.
+        """
+        cached = self._file_ids.get(folder_id)
+        if cached is not None and time.monotonic() - cached[0] < _FILE_INDEX_TTL:
+            return cached[1]
+        
+        folder = self.client.folder(folder_id=folder_id)
+        items = _box_retry(_list_items, folder, limit=1000, fields=["type", "id", "name"])
+        file_ids = {item.name: item.id for item in items if item.type == "file"}
+        self._file_ids[folder_id] = (time.monotonic(), file_ids)
+        return file_ids
+    
+    def _search_file_id(self, folder_id: str, filename: str) -> Optional[str]:
+        """ID of the file named filename directly in folder_id, via one Search API call."""
+        extension = Path(filename).suffix.lstrip(".")
+        results = self.client.search().query(
+            query=f'"{filename}"',
+            limit=_SEARCH_RESULTS,
+            ancestor_folders=[self.client.folder(folder_id=folder_id)],
+            file_extensions=[extension] if extension else None,
+            result_type="file",
+            fields=["type", "id", "name", "parent"]
+        )
+        for item in islice(results, _SEARCH_RESULTS):
+            parent = getattr(item, "parent", None)
+            if item.name == filename and getattr(parent, "object_id", None) == folder_id:
+                return item.id
+        return None
+    
+    def _find_file_id(self, folder_id: str, filename: str) -> Optional[str]:
+        """
+        Resolve a filename in a Box folder to its file ID.
+        
+        Checks the cached folder index, then asks the Search API (one request
+        regardless of folder size). Search indexing lags new uploads, so a miss
+        falls back to listing the folder, which also refreshes the index.
+        """
+        cached = self._file_ids.get(folder_id)
+        if cached is not None and time.monotonic() - cached[0] < _FILE_INDEX_TTL:
+            if filename in cached[1]:
+                return cached[1][filename]
+        
+        file_id = _box_retry(self._search_file_id, folder_id, filename)
+        if file_id is not None:
+            if cached is not None:
+                cached[1][filename] = file_id
+            return file_id
+        
+        self._file_ids.pop(folder_id, None)
+        return self._folder_file_ids(folder_id).get(filename)
+    
     def download_bill_from_box(self, folder_id: str, filename: str, output_path: str) -> bool:
         """
         Download a bill PDF from Box folder.
@@ -110,27 +365,15 @@ class BoxClient:
             return False
         
         try:
-            # Get folder
-            folder = self.client.folder(folder_id=folder_id).get()
-            
             # Find file
-            items = folder.get_items()
-            file_item = None
-            for item in items:
-                if item.name == filename:
-                    file_item = item
-                    break
+            file_id = self._find_file_id(folder_id, filename)
             
-            if not file_item:
+            if not file_id:
                 logger.error(f"File {filename} not found in folder {folder_id}")
                 return False
             
             # Download file
-            output_path_obj = Path(output_path)
-            output_path_obj.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(output_path, "wb") as f:
-                file_item.download_to(f)
+            _box_retry(_download_file, self.client.file(file_id=file_id), output_path)
             
             logger.info(f"Downloaded {filename} to {output_path}")
             return True
@@ -142,6 +385,70 @@ class BoxClient:
             logger.error(f"Error downloading file: {e}")
             return False
     
+    def download_bills_from_box(
+        self,
+        folder_id: str,
+        filenames: List[str],
+        output_dir: str,
+        max_workers: int = _DOWNLOAD_WORKERS
+    ) -> Dict[str, bool]:
+        """
+        Download several bill PDFs from one Box folder concurrently.
+        
+        The folder is listed once to resolve every filename, then the downloads
+        run on a thread pool so their network latency overlaps.
+        
+        Args:
+            folder_id: Box folder ID
+            filenames: Names of the files to download
+            output_dir: Local directory to save the files in
+            max_workers: Maximum number of simultaneous downloads
+        
+        Returns:
+            Dict mapping each filename to True if it was downloaded
+        """
+        results = {filename: False for filename in filenames}
+        if not self.is_available():
+            logger.error("Box client not available")
+            return results
+        
+        try:
+            # Resolve all names with one (paged, cached) listing instead of a lookup per file
+            wanted = set(filenames)
+            folder_file_ids = self._folder_file_ids(folder_id)
+            file_ids = {name: folder_file_ids[name] for name in wanted if name in folder_file_ids}
+        except BoxAPIException as e:
+            logger.error(f"Box API error: {e}")
+            return results
+        except Exception as e:
+            logger.error(f"Error listing files: {e}")
+            return results
+        
+        for filename in wanted.difference(file_ids):
+            logger.error(f"File {filename} not found in folder {folder_id}")
+        if not file_ids:
+            return results
+        
+        def download(filename: str) -> bool:
+            output_path = str(Path(output_dir) / filename)
+            try:
+                _box_retry(_download_file, self.client.file(file_id=file_ids[filename]), output_path)
+                logger.info(f"Downloaded {filename} to {output_path}")
+                return True
+            except BoxAPIException as e:
+                logger.error(f"Box API error downloading {filename}: {e}")
+            except Exception as e:
+                logger.error(f"Error downloading {filename}: {e}")
+            return False
+        
+        names = list(file_ids)
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(names)))) as executor:
+            for filename, ok in zip(names, executor.map(download, names)):
+                results[filename] = ok
+        
+        logger.info(f"Downloaded {sum(results.values())}/{len(results)} bills from folder {folder_id}")
+        return results
+    
     def upload_output_to_box(self, file_path: str, folder_id: str, file_name: Optional[str] = None) -> bool:
         """
         Upload CSV/JSON output to Box folder.
@@ -168,11 +475,10 @@ class BoxClient:
                 file_name = file_path_obj.name
             
             # Get folder
-            folder = self.client.folder(folder_id=folder_id).get()
+            folder = self._folder(folder_id)
             
-            # Upload file
-            with open(file_path, "rb") as f:
-                uploaded_file = folder.upload_stream(f, file_name)
+            # Upload file (reopened on every attempt so a retry starts from byte 0)
+            uploaded_file = _box_retry(_upload_file, folder, file_path, file_name)
             
             logger.info(f"Uploaded {file_name} to Box folder {folder_id}")
             return True
@@ -199,8 +505,8 @@ class BoxClient:
             return []
         
         try:
-            folder = self.client.folder(folder_id=folder_id).get()
-            items = folder.get_items()
+            folder = self._folder(folder_id)
+            items = _box_retry(_list_items, folder)
             
             bills = []
             for item in items:
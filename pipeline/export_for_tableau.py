@@ -5,15 +5,122 @@ Purpose: Generate clean, Tableau-ready CSV files and JSON summaries
 """
 
 import pandas as pd
-import json
 from pathlib import Path
 from typing import Dict, Optional
 import logging
+import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pandas.api.types import is_numeric_dtype, is_object_dtype
+
+from utils.io import fresh_sibling, write_json
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# pyarrow is optional; CSV export falls back to pandas without it
+try:
+    import pyarrow
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Low-cardinality text columns exported as categoricals
+_CATEGORY_COLUMNS = ("state", "institution_type", "equity_risk_class")
+
+
+def _clean_export_column(series: pd.Series) -> pd.Series:
+    """
+    Fill missing values in one export column with a Tableau-friendly type.
+    
+    Numeric columns get 0; text columns get "Unknown" and are cast to str
+    (removing any mixed types). Other dtypes are passed through unchanged.
+    """
+    if is_numeric_dtype(series.dtype):
+        return series.fillna(0)
+    if is_object_dtype(series.dtype) or isinstance(series.dtype, pd.StringDtype):
+        return series.fillna("Unknown").astype(str)
+    return series
+
+
+def _category_export_column(series: pd.Series) -> pd.Series:
+    """
+    Export a low-cardinality text column as a categorical.
+    
+    Stores each distinct value once plus small integer codes, instead of one
+    string per row. Missing values become "Unknown", as for other text columns.
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype("category")
+    if series.isna().any():
+        if "Unknown" not in series.cat.categories:
+            series = series.cat.add_categories("Unknown")
+        series = series.fillna("Unknown")
+    return series
+
+
+def _write_csv(df: pd.DataFrame, filepath: Path, parquet_path: Optional[Path] = None) -> bool:
+    """
+    Write df (without its index) to CSV, plus an optional Parquet copy.
+    
+    Uses pyarrow's multithreaded CSV writer when installed, else pandas. The
+    Parquet copy (zstd) is written from the same Arrow table after the CSV,
+    so it is never older than it; when it cannot be written, any stale copy
+    is removed instead.
+    
+    pyarrow's CSV text differs from DataFrame.to_csv: booleans are
+    true/false, whole-number floats have no ".0", floats are plain decimals
+    (0.00001 rather than 1e-05), timestamps carry microseconds, and the
+    header and string values are quoted. The values Tableau reads are the same.
+    
+    Args:
+        df: DataFrame to export
+        filepath: Output CSV path
+        parquet_path: Optional output Parquet path
+    
+    Returns:
+        True if the Parquet copy was written
+    """
+    # Write a new file rather than truncating the old one, which the Tableau
+    # mirror may be a hard link to
+    filepath.unlink(missing_ok=True)
+    if PYARROW_AVAILABLE:
+        try:
+            table = pyarrow.Table.from_pandas(df, preserve_index=False)
+        except (ValueError, TypeError, NotImplementedError) as e:
+            # Mixed-type object columns have no Arrow type
+            logger.warning(f"Could not convert {filepath} to Arrow ({e}); writing with pandas")
+        else:
+            pacsv.write_csv(table, filepath)
+            if parquet_path is not None:
+                pq.write_table(table, parquet_path, compression="zstd")
+            return parquet_path is not None
+    df.to_csv(filepath, index=False)
+    if parquet_path is not None:
+        # Stale copies must not shadow the new CSV
+        parquet_path.unlink(missing_ok=True)
+    return False
+
+
+def _link_or_copy(src: str, dst: Path) -> None:
+    """
+    Mirror src at dst, by hard link when possible.
+    
+    A hard link costs no data copy; across filesystems (or where links are not
+    supported) the file is copied instead. Either way the new file is created
+    under a temporary name and renamed over dst, so readers of dst never see
+    a partially written file.
+    """
+    tmp_path = dst.with_suffix(dst.suffix + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+    try:
+        os.link(src, tmp_path)
+    except OSError:
+        shutil.copy2(src, tmp_path)
+    os.replace(tmp_path, dst)
+
 
 def export_predicted_impact(
     predictions_df: pd.DataFrame,
@@ -23,6 +130,9 @@ def export_predicted_impact(
     """
     Export college-level predictions to CSV.
     
+    A zstd Parquet copy with the same stem is written next to the CSV (when
+    pyarrow is installed); it keeps dtypes and re-reads much faster.
+    
     Args:
         predictions_df: DataFrame with predictions
         scenario_name: Scenario identifier
@@ -34,12 +144,12 @@ def export_predicted_impact(
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
     
-    # Create a copy for export to avoid modifying original
-    export_df = predictions_df.copy()
+    # Export column -> source column in predictions_df (the original is never modified)
+    source_columns = {col: col for col in predictions_df.columns}
     
     # Map institution_name to name if needed (master dataset uses institution_name)
-    if "institution_name" in export_df.columns and "name" not in export_df.columns:
-        export_df["name"] = export_df["institution_name"]
+    if "institution_name" in source_columns and "name" not in source_columns:
+        source_columns["name"] = "institution_name"
     
     # Select key columns for Tableau
     key_columns = [
@@ -59,14 +169,14 @@ def export_predicted_impact(
     # Add geographic columns if available
     geographic_cols = ["latitude", "longitude"]
     for col in geographic_cols:
-        if col in export_df.columns and col not in key_columns:
+        if col in source_columns and col not in key_columns:
             key_columns.append(col)
     
     # Add demographic columns if available
     # Try to find enrollment column (could be enrollment or total_enrollment)
     enrollment_col = None
     for col in ["enrollment", "total_enrollment", "total_enroll"]:
-        if col in export_df.columns:
+        if col in source_columns:
             enrollment_col = col
             break
     
@@ -75,32 +185,26 @@ def export_predicted_impact(
         demographic_cols.append(enrollment_col)
     
     for col in demographic_cols:
-        if col in export_df.columns and col not in key_columns:
+        if col in source_columns and col not in key_columns:
             key_columns.append(col)
     
     # Filter to available columns
-    export_columns = [col for col in key_columns if col in export_df.columns]
-    
-    # Create export DataFrame with selected columns
-    export_df = export_df[export_columns].copy()
+    export_columns = [col for col in key_columns if col in source_columns]
     
-    # Fill missing values
-    numeric_cols = export_df.select_dtypes(include=['number']).columns
-    export_df[numeric_cols] = export_df[numeric_cols].fillna(0)
-    
-    categorical_cols = export_df.select_dtypes(include=['object']).columns
-    export_df[categorical_cols] = export_df[categorical_cols].fillna("Unknown")
-    
-    # Ensure consistent types
-    for col in export_df.columns:
-        if export_df[col].dtype == 'object':
-            # Remove any mixed types
-            export_df[col] = export_df[col].astype(str)
+    # Create export DataFrame with selected columns straight from predictions_df,
+    # filling missing values and ensuring consistent types in one pass per column
+    # (only the selected columns are materialized; the full frame is never copied)
+    export_df = pd.DataFrame({
+        col: _category_export_column(predictions_df[source_columns[col]]) if col in _CATEGORY_COLUMNS
+        else _clean_export_column(predictions_df[source_columns[col]])
+        for col in export_columns
+    })
     
     # Export to CSV
     filename = f"predicted_impact_{scenario_name}.csv"
     filepath = output_path / filename
-    export_df.to_csv(filepath, index=False)
+    if _write_csv(export_df, filepath, parquet_path=filepath.with_suffix(".parquet")):
+        logger.info(f"Parquet copy saved to {filepath.with_suffix('.parquet')}")
     
     logger.info(f"Exported predicted impact to {filepath}")
     logger.info(f"Shape: {export_df.shape}")
@@ -131,24 +235,20 @@ def export_equity_analysis(
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
     
-    # Group by equity risk class
-    equity_df = predictions_df.groupby("equity_risk_class").agg({
-        "institution_id": "count",
-        "tuition_change_dollars": ["mean", "sum"],
-        "students_affected": "sum",
-        "enrollment_change_pct": "mean",
-        "grad_rate_change": "mean"
-    }).reset_index()
-    
-    # Flatten column names
-    equity_df.columns = ["equity_risk_class", "college_count", "avg_tuition_change", 
-                         "total_tuition_impact", "total_students_affected", 
-                         "avg_enrollment_change", "avg_grad_rate_change"]
+    # Group by equity risk class; named aggregations give the flat column names directly
+    equity_df = predictions_df.groupby("equity_risk_class", observed=True).agg(
+        college_count=("institution_id", "count"),
+        avg_tuition_change=("tuition_change_dollars", "mean"),
+        total_tuition_impact=("tuition_change_dollars", "sum"),
+        total_students_affected=("students_affected", "sum"),
+        avg_enrollment_change=("enrollment_change_pct", "mean"),
+        avg_grad_rate_change=("grad_rate_change", "mean")
+    ).reset_index()
     
     # Export to CSV
     filename = f"equity_analysis_{scenario_name}.csv"
     filepath = output_path / filename
-    equity_df.to_csv(filepath, index=False)
+    _write_csv(equity_df, filepath)
     
     logger.info(f"Exported equity analysis to {filepath}")
     
@@ -182,8 +282,9 @@ def export_summary_json(
     filename = f"summary_{scenario_name}.json"
     filepath = output_path / filename
     
-    with open(filepath, "w") as f:
-        json.dump(summary_dict, f, indent=2, default=str)
+    # New file, not truncated in place (the Tableau mirror may link to it)
+    filepath.unlink(missing_ok=True)
+    write_json(summary_dict, filepath)
     
     logger.info(f"Exported summary to {filepath}")
     
@@ -212,53 +313,67 @@ def export_for_tableau(
     
     exported_files = {}
     
-    # Export predicted impact CSV
-    impact_csv = export_predicted_impact(
-        predictions_df,
-        scenario_name,
-        output_dir=f"{output_base_dir}/predictions"
-    )
-    exported_files["predicted_impact"] = impact_csv
+    # The three exports are independent and mostly file I/O (pandas, pyarrow
+    # and file writes release the GIL), so they run concurrently
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        # Export predicted impact CSV
+        impact_future = executor.submit(
+            export_predicted_impact,
+            predictions_df,
+            scenario_name,
+            output_dir=f"{output_base_dir}/predictions"
+        )
+        
+        # Export equity analysis CSV
+        equity_future = executor.submit(
+            export_equity_analysis,
+            predictions_df,
+            scenario_name,
+            output_dir=f"{output_base_dir}/equity_analysis"
+        )
+        
+        # Export summary JSON
+        summary_future = executor.submit(
+            export_summary_json,
+            summary_dict,
+            scenario_name,
+            output_dir=f"{output_base_dir}/summaries"
+        )
+        
+        impact_csv = impact_future.result()
+        equity_csv = equity_future.result()
+        summary_json = summary_future.result()
     
-    # Export equity analysis CSV
-    equity_csv = export_equity_analysis(
-        predictions_df,
-        scenario_name,
-        output_dir=f"{output_base_dir}/equity_analysis"
-    )
+    exported_files["predicted_impact"] = impact_csv
+    impact_parquet = Path(impact_csv).with_suffix(".parquet")
+    if impact_parquet.exists():
+        exported_files["predicted_impact_parquet"] = str(impact_parquet)
     if equity_csv:
         exported_files["equity_analysis"] = equity_csv
-    
-    # Export summary JSON
-    summary_json = export_summary_json(
-        summary_dict,
-        scenario_name,
-        output_dir=f"{output_base_dir}/summaries"
-    )
     exported_files["summary"] = summary_json
     
     logger.info(f"Export complete. Files exported: {list(exported_files.keys())}")
     
-    # Copy files to fixed Tableau location for easy connection
+    # Mirror files at fixed Tableau location for easy connection
     tableau_data_dir = Path("tableau/data_sources")
     tableau_data_dir.mkdir(parents=True, exist_ok=True)
     
     # Copy predicted impact CSV to fixed location
     if "predicted_impact" in exported_files and Path(exported_files["predicted_impact"]).exists():
         tableau_predictions = tableau_data_dir / "current_predictions.csv"
-        shutil.copy2(exported_files["predicted_impact"], tableau_predictions)
+        _link_or_copy(exported_files["predicted_impact"], tableau_predictions)
         logger.info(f"Copied predictions to {tableau_predictions}")
     
     # Copy equity analysis CSV to fixed location
     if "equity_analysis" in exported_files and exported_files["equity_analysis"] and Path(exported_files["equity_analysis"]).exists():
         tableau_equity = tableau_data_dir / "current_equity_analysis.csv"
-        shutil.copy2(exported_files["equity_analysis"], tableau_equity)
+        _link_or_copy(exported_files["equity_analysis"], tableau_equity)
         logger.info(f"Copied equity analysis to {tableau_equity}")
     
     # Copy summary JSON to fixed location
     if "summary" in exported_files and Path(exported_files["summary"]).exists():
         tableau_summary = tableau_data_dir / "current_summary.json"
-        shutil.copy2(exported_files["summary"], tableau_summary)
+        _link_or_copy(exported_files["summary"], tableau_summary)
         logger.info(f"Copied summary to {tableau_summary}")
     
     return exported_files
@@ -271,7 +386,12 @@ if __name__ == "__main__":
         csv_path = sys.argv[1]
         scenario_name = sys.argv[2]
         
-        df = pd.read_csv(csv_path)
+        # Prefer an up-to-date Parquet copy of the input (keeps dtypes, skips CSV parsing)
+        parquet_path = fresh_sibling(csv_path, ".parquet") if PYARROW_AVAILABLE else None
+        if parquet_path is not None:
+            df = pd.read_parquet(parquet_path)
+        else:
+            df = pd.read_csv(csv_path)
         summary = {
             "total_colleges_affected": len(df),
             "total_students_impacted": int(df.get("students_affected", 0).sum()) if "students_affected" in df.columns else 0
@@ -20,8 +20,23 @@ try:
 except ImportError:
     pass  # python-dotenv not installed, will use system env vars
 
+# Native model formats are loaded when the boosting libraries are installed
+try:
+    import xgboost as xgb
+    XGBOOST_AVAILABLE = True
+except ImportError:
+    XGBOOST_AVAILABLE = False
+
+try:
+    import lightgbm as lgb
+    LIGHTGBM_AVAILABLE = True
+except ImportError:
+    LIGHTGBM_AVAILABLE = False
+
 from models.feature_engineering import prepare_features, load_preprocessing_artifacts
+from models.model_config import MODEL_CONFIGS
 from pipeline.extract_bill import process_bill
+from utils.io import fresh_sibling
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -145,6 +160,37 @@ def build_prediction_features(
     return X
 
 
+def load_model(models_path: Path, model_name: str):
+    """
+    Load a trained model, preferring the native XGBoost/LightGBM file over the pickle.
+    
+    Args:
+        models_path: Directory containing trained models
+        model_name: Model name (tuition, enrollment, grad_rate, equity)
+    
+    Returns:
+        Model with a predict method, or None if no saved model exists
+    """
+    model_path = models_path / f"{model_name}_model.pkl"
+    model_type = MODEL_CONFIGS.get(model_name, {}).get("model_type", "")
+    
+    if XGBOOST_AVAILABLE and model_type.startswith("xgb"):
+        native_path = fresh_sibling(model_path, ".ubj")
+        if native_path is not None:
+            model = xgb.XGBClassifier() if model_type == "xgb_classifier" else xgb.XGBRegressor()
+            model.load_model(native_path)
+            return model
+    
+    if LIGHTGBM_AVAILABLE and model_type.startswith("lgbm"):
+        native_path = fresh_sibling(model_path, ".txt")
+        if native_path is not None:
+            return lgb.Booster(model_file=str(native_path))
+    
+    if model_path.exists():
+        return joblib.load(model_path)
+    return None
+
+
 def run_predictions(
     colleges_df: pd.DataFrame,
     feature_matrix: pd.DataFrame,
@@ -169,12 +215,12 @@ def run_predictions(
     model_names = ["tuition", "enrollment", "grad_rate", "equity"]
     
     for model_name in model_names:
-        model_path = models_path / f"{model_name}_model.pkl"
-        if model_path.exists():
-            models[model_name] = joblib.load(model_path)
+        model = load_model(models_path, model_name)
+        if model is not None:
+            models[model_name] = model
             logger.info(f"Loaded {model_name} model")
         else:
-            logger.warning(f"Model not found: {model_path}")
+            logger.warning(f"Model not found: {models_path / f'{model_name}_model.pkl'}")
     
     # Predict tuition change
     if "tuition" in models:
@@ -0,0 +1 @@
+# Shared helper modules
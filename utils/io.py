@@ -0,0 +1,104 @@
+"""
+Shared IO Helpers
+
+Purpose: JSON result writing and derived-file lookup used across the
+analysis, data, models and pipeline modules, kept free of heavy dependencies
+"""
+
+import datetime
+import json
+import math
+from pathlib import Path, PurePath
+from typing import Optional, Union
+
+# orjson is optional; write_json falls back to the standard json module without it
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _json_ready(value):
+    """
+    Copy of a results value with numpy arrays/scalars as Python values and NaN as None.
+    
+    Both write_json paths serialize this copy, so the file does not depend on
+    whether orjson is installed (json alone would write NaN and Infinity,
+    which are not JSON).
+    """
+    if isinstance(value, dict):
+        return {_json_ready(key): _json_ready(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_ready(item) for item in value]
+    if hasattr(value, "tolist"):
+        # numpy arrays and scalars (a scalar's tolist() is a Python scalar)
+        return _json_ready(value.tolist())
+    # NaN/inf are not valid JSON; NaT is the datetime not equal to itself
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, datetime.datetime) and value != value:
+        return None
+    return value
+
+
+def _json_default(value):
+    """Serialize the non-JSON types found in results: timestamps and paths."""
+    if isinstance(value, datetime.datetime):
+        # Same text as str(), which the summaries have always used
+        return value.isoformat(sep=" ")
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, PurePath):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def write_json(data, path) -> None:
+    """
+    Write a results dict to a JSON file with 2-space indentation.
+    
+    numpy values are converted and NaN/inf are written as null before
+    serializing; timestamps and paths go through _json_default. Uses orjson
+    when installed, the standard json module otherwise, with the same output.
+    
+    Args:
+        data: JSON-serializable results (may contain numpy values)
+        path: Output file path
+    """
+    data = _json_ready(data)
+    if ORJSON_AVAILABLE:
+        payload = orjson.dumps(
+            data,
+            default=_json_default,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        )
+        with open(path, "wb") as f:
+            f.write(payload)
+    else:
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2, default=_json_default)
+
+
+def fresh_sibling(path: Union[str, Path], suffix: str) -> Optional[Path]:
+    """
+    Sibling of a file with another suffix, when it can be read in its place.
+    
+    The sibling (a Parquet/Feather copy of a CSV, a native dump of a pickled
+    model, ...) is used when it exists and is at least as new as the source,
+    or when the source itself is missing.
+    
+    Args:
+        path: Source file path
+        suffix: Suffix of the derived copy, e.g. ".parquet"
+    
+    Returns:
+        Path to the sibling, or None when the source should be read
+    """
+    path = Path(path)
+    sibling = path.with_suffix(suffix)
+    if not sibling.exists():
+        return None
+    if path.exists() and sibling.stat().st_mtime < path.stat().st_mtime:
+        return None
+    return sibling